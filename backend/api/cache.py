@@ -0,0 +1,148 @@
+import json
+import os
+from collections import OrderedDict
+from sqlalchemy import select
+from time import monotonic
+from .models.models import DataVersion
+
+# optional shared backend for several API workers, the in-process one is used otherwise
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+class MemoryBackend:
+    """In-process LRU of at most maxsize entries, each expiring ttl seconds after it was stored."""
+    name = 'memory'
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires < monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value, ttl: float):
+        self._entries[key] = (value, monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Redis shared by all API workers, values are stored as JSON. Eviction is
+    left to the server's maxmemory policy.
+    """
+    name = 'redis'
+
+    def __init__(self, url: str, prefix: str = 'hnapi:'):
+        if redis is None:
+            raise ValueError('redis is not installed')
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        value = await self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value, ttl: float):
+        await self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    def __len__(self):
+        return 0
+
+
+class DataVersions:
+    """
+    Version stamps of the DWH datasets from dwh.data_versions, re-read from
+    the database at most every refresh seconds.
+    """
+    def __init__(self, refresh: float = 2.0):
+        self.refresh = refresh
+        self._versions = {}
+        self._read_at = None
+
+    async def get(self, db, dataset: str):
+        """
+        Returns:
+            tuple[int, datetime]: Version of the dataset and when the ETL bumped it, (0, None) if it never did.
+        """
+        if self._read_at is None or monotonic() - self._read_at > self.refresh:
+            rows = await db.execute(select(DataVersion.dataset, DataVersion.version, DataVersion.updated_at))
+            self._versions = {dataset: (version, updated_at) for dataset, version, updated_at in rows}
+            self._read_at = monotonic()
+        return self._versions.get(dataset, (0, None))
+
+
+class ResponseCache:
+    """
+    Caches JSON-compatible endpoint results under the current version of the
+    dataset they are read from. When the ETL bumps the version every key
+    changes, so stale entries are never read again and age out of the LRU.
+
+    Args:
+        backend (MemoryBackend | RedisBackend): Where entries are stored.
+        versions (DataVersions): Source of the dataset versions.
+        ttl (float): Seconds an entry is served at most, also without a new version.
+    """
+    def __init__(self, backend, versions: DataVersions, ttl: float = 300.0):
+        self.backend = backend
+        self.versions = versions
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db, dataset: str, key: tuple, load):
+        """
+        Returns the cached result for key, or awaits load() and caches what it returns.
+
+        Args:
+            db (AsyncSession): Session the dataset version is read with.
+            dataset (str): dwh.data_versions dataset the result is derived from.
+            key (tuple): Identifies the result within the dataset, e.g. ('agg', term_id, agg).
+            load (Callable[[], Awaitable]): Computes the result on a miss.
+        """
+        version, _ = await self.versions.get(db, dataset)
+        full_key = ':'.join(str(part) for part in (dataset, version, *key))
+        value = await self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await load()
+        await self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else None,
+        }
+
+
+def _make_backend():
+    url = os.environ.get('API_CACHE_URL')
+    if url:
+        return RedisBackend(url)
+    return MemoryBackend(maxsize=int(os.environ.get('API_CACHE_MAXSIZE', 4096)))
+
+
+data_versions = DataVersions(refresh=float(os.environ.get('API_CACHE_VERSION_REFRESH', 2.0)))
+response_cache = ResponseCache(_make_backend(), data_versions, ttl=float(os.environ.get('API_CACHE_TTL', 300.0)))
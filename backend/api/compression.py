@@ -0,0 +1,104 @@
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+
+# optional, without it responses are only gzip compressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _accepted(accept_encoding: str):
+    """Codings of an Accept-Encoding header with a non-zero quality."""
+    codings = set()
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            codings.add(coding.strip())
+    return codings
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least minimum_size bytes with brotli when the
+    client accepts it and the package is installed, with gzip otherwise.
+
+    The body is buffered until it is complete, which suits the API's JSON
+    responses but would defeat streaming ones.
+
+    Args:
+        app (ASGIApp): Application to wrap.
+        minimum_size (int): Smaller bodies are sent as they are.
+        gzip_level (int): gzip compression level, 1 to 9.
+        brotli_quality (int): brotli quality, 0 to 11, the higher ones are too slow per request.
+    """
+    def __init__(self, app, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _coding(self, accept_encoding: str):
+        accepted = _accepted(accept_encoding)
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def _compress(self, coding: str, body: bytes):
+        if coding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        coding = self._coding(Headers(scope=scope).get('accept-encoding', ''))
+        if coding is None:
+            async def send_uncompressed(message):
+                # the response depends on Accept-Encoding even when it is not
+                # compressed, a shared cache must not serve it to a client that
+                # asked for gzip or the other way round
+                if message['type'] == 'http.response.start':
+                    MutableHeaders(raw=message['headers']).add_vary_header('Accept-Encoding')
+                await send(message)
+
+            await self.app(scope, receive, send_uncompressed)
+            return
+
+        start = None
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal start
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+            chunks.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+
+            body = b''.join(chunks)
+            headers = MutableHeaders(raw=start['headers'])
+            headers.add_vary_header('Accept-Encoding')
+            if len(body) >= self.minimum_size and 'content-encoding' not in headers:
+                body = self._compress(coding, body)
+                headers['Content-Encoding'] = coding
+                headers['Content-Length'] = str(len(body))
+            await send(start)
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
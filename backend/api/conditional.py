@@ -0,0 +1,55 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import data_versions
+from .database import get_async_db
+
+
+def _etag_matches(if_none_match: str, etag: str):
+    # weak comparison, the representation also varies by Content-Encoding
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+def _not_modified_since(if_modified_since: str, updated_at):
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have whole seconds
+    return since.tzinfo is not None and updated_at.replace(microsecond=0) <= since
+
+
+def versioned(dataset: str):
+    """
+    Dependency making an endpoint's response conditional on the version of
+    the DWH dataset it is derived from.
+
+    Responses carry a weak ETag of the dataset version and the time the ETL
+    bumped it as Last-Modified. A request whose If-None-Match, or else
+    If-Modified-Since, still matches is answered with 304 before the
+    endpoint queries or serializes anything.
+
+    Args:
+        dataset (str): dwh.data_versions dataset, e.g. 'termpop'.
+    """
+    async def check(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        version, updated_at = await data_versions.get(db, dataset)
+        headers = {'ETag': f'W/"{dataset}-{version}"', 'Cache-Control': 'no-cache'}
+        if updated_at is not None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+            headers['Last-Modified'] = format_datetime(updated_at, usegmt=True)
+
+        if_none_match = request.headers.get('if-none-match')
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, headers['ETag'])
+        else:
+            not_modified = if_modified_since is not None and updated_at is not None and _not_modified_since(if_modified_since, updated_at)
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return check
@@ -1,32 +1,63 @@
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..models import models
+from ..models import buckets, models
 
-def get_comment(db: Session, comment_id: int):
-    return db.query(models.Comment).filter(models.Comment.id == comment_id).first()
+# every query is built once here and run by a blocking and an async variant
 
-def get_termpop_agg(db: Session, term_id: int, agg: str = 'year'):
-    assert agg in ['year', 'month', 'week']
-
-    if agg == 'year':
-        group_by_columns = [models.TermPopAgg.year]
-    elif agg == 'month':
-        group_by_columns = [models.TermPopAgg.year, models.TermPopAgg.month]
-    elif agg == 'week':
-        group_by_columns = [models.TermPopAgg.year, models.TermPopAgg.week]
-    
-    results = (
-        db.query(
-            *group_by_columns,
-            func.sum(models.TermPopAgg.occurrence_count).label('occurrence_count')
+def comment_query(comment_id: int):
+    return select(models.Comment).where(models.Comment.id == comment_id)
+
+def termpop_agg_query(term_id: int, agg: str = 'year'):
+    assert agg in models.TERMPOP_ROLLUPS
+
+    # the ETL keeps one rollup table per grain, this is a range read on its primary key
+    rollup = models.TERMPOP_ROLLUPS[agg]
+
+    return (
+        select(
+            *buckets.labels(agg, rollup.bucket),
+            rollup.occurrence_count
         )
-        .filter(models.TermPopAgg.term_id == term_id)
-        .group_by(*group_by_columns)
-        .order_by(*group_by_columns)
-        .all()
+        .where(rollup.term_id == term_id)
+        .order_by(rollup.bucket)
     )
 
-    return results
+def termpop_series_query(term_ids, agg: str = 'year'):
+    assert agg in models.TERMPOP_ROLLUPS
+
+    # one row per term with its rollup keys and counts as arrays, far cheaper
+    # to transfer and decode than a row per term and key
+    rollup = models.TERMPOP_ROLLUPS[agg]
+
+    return (
+        select(
+            rollup.term_id,
+            func.array_agg(aggregate_order_by(buckets.days_of(rollup.bucket), rollup.bucket)),
+            func.array_agg(aggregate_order_by(rollup.occurrence_count, rollup.bucket))
+        )
+        .where(rollup.term_id.in_(term_ids))
+        .group_by(rollup.term_id)
+    )
+
+def termpop_terms_query():
+    return select(models.TermPopTerm)
+
+def get_comment(db: Session, comment_id: int):
+    return db.execute(comment_query(comment_id)).scalars().first()
+
+def get_termpop_agg(db: Session, term_id: int, agg: str = 'year'):
+    return db.execute(termpop_agg_query(term_id, agg)).all()
+
+async def get_comment_async(db: AsyncSession, comment_id: int):
+    return (await db.execute(comment_query(comment_id))).scalars().first()
+
+async def get_termpop_agg_async(db: AsyncSession, term_id: int, agg: str = 'year'):
+    return (await db.execute(termpop_agg_query(term_id, agg))).all()
+
+async def get_termpop_series_async(db: AsyncSession, term_ids, agg: str = 'year'):
+    return (await db.execute(termpop_series_query(term_ids, agg))).all()
 
-def get_termpop_terms(db: Session):
-    return db.query(models.TermPopTerm).all()
\ No newline at end of file
+async def get_termpop_terms_async(db: AsyncSession):
+    return (await db.execute(termpop_terms_query())).scalars().all()
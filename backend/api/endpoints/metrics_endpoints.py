@@ -0,0 +1,15 @@
+from ..cache import response_cache
+from ..database import created_engines, pool_metrics
+from fastapi import APIRouter
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics/pool")
+async def read_pool_metrics():
+    # checkout waits and overflows show whether the pool fits the worker count,
+    # pools this process never opened are left out
+    return {name: pool_metrics(engine) for name, engine in created_engines().items()}
+
+@metrics_router.get("/metrics/cache")
+async def read_cache_metrics():
+    return response_cache.stats()
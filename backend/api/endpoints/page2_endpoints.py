@@ -1,47 +1,101 @@
+import numpy as np
+from ..cache import response_cache
+from ..conditional import versioned
 from ..crud import crud
+from ..models import buckets
 from ..schemas import schemas
-from ..database import get_db
-from fastapi import Depends, HTTPException, APIRouter
-from sqlalchemy.orm import Session
+from ..database import get_async_db
+from fastapi import Depends, HTTPException, APIRouter, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 page2_router = APIRouter()
 
-@page2_router.get("/termpop/agg", response_model=List[schemas.TermPopAggBase])
-def read_termpop_agg(
+# term IDs a single /termpop/series request may compare
+MAX_SERIES_TERMS = 100
+
+@page2_router.get("/termpop/agg", response_model=List[schemas.TermPopAggBase], dependencies=[Depends(versioned('termpop'))])
+async def read_termpop_agg(
     term_id: int,
     agg: str = 'year',
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validate the 'agg' parameter
     if agg not in ['year', 'month', 'week']:
         raise HTTPException(status_code=400, detail="Aggregation must be 'year', 'month', or 'week'.")
 
-    # Retrieve aggregated data
-    data = crud.get_termpop_agg(db=db, term_id=term_id, agg=agg)
+    # Retrieve aggregated data, the same until the ETL bumps the termpop version
+    async def load():
+        data = await crud.get_termpop_agg_async(db=db, term_id=term_id, agg=agg)
 
-    if not data:
+        # Convert the query results to TermAggregation fields
+        aggregations = []
+        for row in data:
+            aggregation_data = {
+                'year': row[0],
+                'occurrence_count': row[-1]
+            }
+            if agg == 'month':
+                aggregation_data['month'] = row[1]
+            elif agg == 'week':
+                aggregation_data['week'] = row[1]
+            aggregations.append(aggregation_data)
+        return aggregations
+
+    aggregations = await response_cache.get(db, 'termpop', ('agg', term_id, agg), load)
+
+    if not aggregations:
         raise HTTPException(status_code=404, detail="No data found for the specified term_id and aggregation.")
 
-    # Convert the query results to a list of TermAggregation instances
-    aggregations = []
-    for row in data:
-        aggregation_data = {
-            'year': row[0],
-            'occurrence_count': row[-1]
+    return aggregations
+
+
+@page2_router.get("/termpop/series", response_model=schemas.TermPopSeries, dependencies=[Depends(versioned('termpop'))])
+async def read_termpop_series(
+    term_ids: List[int] = Query(...),
+    agg: str = 'year',
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Validate the parameters, repeated term IDs are compared once
+    if agg not in ['year', 'month', 'week']:
+        raise HTTPException(status_code=400, detail="Aggregation must be 'year', 'month', or 'week'.")
+    term_ids = list(dict.fromkeys(term_ids))
+    if len(term_ids) > MAX_SERIES_TERMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_TERMS} term IDs can be compared at once.")
+
+    # Retrieve every term in one query and lay the counts out on a shared time axis
+    async def load():
+        rows = await crud.get_termpop_series_async(db=db, term_ids=term_ids, agg=agg)
+
+        days = [np.array(keys, dtype=np.int64) for _, keys, _ in rows]
+        axis = np.unique(np.concatenate(days)) if days else np.array([], dtype=np.int64)
+        position = {term_id: index for index, term_id in enumerate(term_ids)}
+        counts = np.zeros((len(term_ids), len(axis)), dtype=np.int64)
+        for (term_id, _, occurrence_counts), term_days in zip(rows, days):
+            counts[position[term_id], np.searchsorted(axis, term_days)] = occurrence_counts
+
+        return {
+            'agg': agg,
+            **{label: values.tolist() for label, values in buckets.labels_of_days(agg, axis.astype('datetime64[D]')).items()},
+            'term_ids': term_ids,
+            'counts': counts.tolist(),
         }
-        if agg == 'month':
-            aggregation_data['month'] = row[1]
-        elif agg == 'week':
-            aggregation_data['week'] = row[1]
-        aggregations.append(schemas.TermPopAggBase(**aggregation_data))
 
-    return aggregations
+    series = await response_cache.get(db, 'termpop', ('series', agg, *term_ids), load)
+
+    if not series['year']:
+        raise HTTPException(status_code=404, detail="No data found for the specified term_ids and aggregation.")
+
+    return series
+
 
+@page2_router.get("/termpop/terms", response_model=List[schemas.TermPopTermBase], dependencies=[Depends(versioned('termpop'))])
+async def read_termpop_terms(db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        terms = await crud.get_termpop_terms_async(db=db)
+        return [{'id': term.id, 'term': term.term} for term in terms]
 
-@page2_router.get("/termpop/terms", response_model=List[schemas.TermPopTermBase])
-def read_termpop_terms(db: Session = Depends(get_db)):
-    data = crud.get_termpop_terms(db=db)
+    data = await response_cache.get(db, 'termpop', ('terms',), load)
     if not data:
         raise HTTPException(status_code=404, detail="No term data found.")
     return data
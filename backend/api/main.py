@@ -1,9 +1,14 @@
 #!/usr/bin/env python
 
 from fastapi import FastAPI
+from .compression import CompressionMiddleware
 from .endpoints.page1_endpoints import page1_router
 from .endpoints.page2_endpoints import page2_router
+from .endpoints.metrics_endpoints import metrics_router
 
 app = FastAPI()
+# week-grain series are tens of kilobytes of JSON and compress well
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
 app.include_router(page1_router)
-app.include_router(page2_router)
\ No newline at end of file
+app.include_router(page2_router)
+app.include_router(metrics_router)
\ No newline at end of file
@@ -0,0 +1,62 @@
+import numpy as np
+from sqlalchemy import TIMESTAMP, Date, Integer, cast, extract, func, literal
+
+# Date buckets of the DWH tables, the SQL expressions and their NumPy
+# equivalent live here together so the ETL engines and the API agree.
+#
+# termpop_agg stores one row per term and bucket, a bucket being the first day
+# of the part of an ISO week that lies in one calendar month. A bucket never
+# spans two weeks, months or years, so every rollup is an exact sum of buckets.
+
+
+def week_of(time):
+    """ISO week of a timestamp, as the date of its Monday."""
+    return cast(func.date_trunc('week', time), Date)
+
+
+def bucket_of(time):
+    """termpop_agg bucket of a timestamp."""
+    return cast(func.greatest(func.date_trunc('week', time), func.date_trunc('month', time)), Date)
+
+
+def truncate(grain: str, bucket):
+    """Rollup key of a bucket, grain being 'year', 'month' or 'week'."""
+    return cast(func.date_trunc(grain, cast(bucket, TIMESTAMP)), Date)
+
+
+def labels(grain: str, bucket):
+    """Integer columns the API reports a rollup key as, weeks by ISO year and week number."""
+    if grain == 'week':
+        parts = ('isoyear', 'week')
+    elif grain == 'month':
+        parts = ('year', 'month')
+    else:
+        parts = ('year',)
+    return [cast(extract(part, bucket), Integer).label(part.replace('iso', '')) for part in parts]
+
+
+def days_of(date):
+    """A DATE as days since 1970-01-01, cheaper to fetch in bulk than dates and read as datetime64[D] for free."""
+    return date - cast(literal('1970-01-01'), Date)
+
+
+def bucket_of_days(days: np.ndarray):
+    """bucket_of for an array of datetime64[D] days."""
+    # 1970-01-01 was a Thursday, three days after a Monday
+    week = days - (days.astype(np.int64) + 3) % 7
+    month = days.astype('datetime64[M]').astype('datetime64[D]')
+    return np.maximum(week, month)
+
+
+def labels_of_days(grain: str, days: np.ndarray):
+    """labels for an array of datetime64[D] rollup keys, as integer arrays by label."""
+    if grain == 'week':
+        # the ISO year of a week is the year of its Thursday
+        thursday = days - (days.astype(np.int64) + 3) % 7 + 3
+        year = thursday.astype('datetime64[Y]')
+        week = (thursday - year.astype('datetime64[D]')).astype(np.int64) // 7 + 1
+        return {'year': year.astype(np.int64) + 1970, 'week': week}
+    year = days.astype('datetime64[Y]').astype(np.int64) + 1970
+    if grain == 'month':
+        return {'year': year, 'month': days.astype('datetime64[M]').astype(np.int64) % 12 + 1}
+    return {'year': year}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, SmallInteger, Integer, String, Text, TIMESTAMP, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import BigInteger, Boolean, Column, Date, Float, Integer, String, Text, TIMESTAMP, ForeignKey, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -99,6 +99,26 @@ class Scrape(Base):
     scrape_time = Column(TIMESTAMP)
 
 
+# Scrape shards table
+class ScrapeShard(Base):
+    __tablename__ = 'scrape_shards'
+    __table_args__ = {'schema': 'raw'}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    start_id = Column(Integer, nullable=False)
+    end_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False)
+
+
+# Scrape ranges table
+class ScrapeRange(Base):
+    __tablename__ = 'scrape_ranges'
+    __table_args__ = {'schema': 'raw'}
+
+    start_id = Column(Integer, primary_key=True)
+    end_id = Column(Integer, nullable=False, index=True)
+
+
 # Skipped table
 class Skipped(Base):
     __tablename__ = 'skipped'
@@ -107,6 +127,18 @@ class Skipped(Base):
     item = Column(Integer, primary_key=True, index=True)
 
 
+# Ids whose fetch failed, gaps in raw.scrape_ranges until a backfill gets them
+class Failed(Base):
+    __tablename__ = 'failed'
+    __table_args__ = {'schema': 'raw'}
+
+    item = Column(Integer, primary_key=True)
+    status = Column(Integer)
+    attempts = Column(Integer, nullable=False)
+    permanent = Column(Boolean, nullable=False)
+    failed_at = Column(TIMESTAMP, nullable=False)
+
+
 # Termpop Terms
 class TermPopTerm(Base):
     __tablename__ = 'termpop_terms'
@@ -114,24 +146,118 @@ class TermPopTerm(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     term = Column(Text, nullable=False)
+    last_comment_id = Column(Integer, nullable=False, default=0)
 
     # Relationship to TermPopAgg
     aggregations = relationship('TermPopAgg', back_populates='term')
 
-# Termpop Agg
+# Termpop Agg, bucket as defined in buckets.bucket_of
 class TermPopAgg(Base):
     __tablename__ = 'termpop_agg'
     __table_args__ = (
-        PrimaryKeyConstraint('term_id', 'year', 'month', 'week', name='termpop_agg_pkey'),
+        PrimaryKeyConstraint('term_id', 'bucket', name='termpop_agg_pkey'),
         {'schema': 'dwh'}
     )
 
     term_id = Column(Integer, ForeignKey('dwh.termpop_terms.id'), nullable=False)
-    year = Column(SmallInteger, nullable=False)
-    month = Column(SmallInteger, nullable=False)
-    week = Column(SmallInteger, nullable=False)
+    bucket = Column(Date, nullable=False)
     occurrence_count = Column(Integer, nullable=False)
 
     # Relationship to TermPopTerm
     term = relationship('TermPopTerm', back_populates='aggregations')
 
+# Termpop rollups, termpop_agg summed up to the first day of each year, month and ISO week
+class TermPopByYear(Base):
+    __tablename__ = 'termpop_by_year'
+    __table_args__ = (
+        PrimaryKeyConstraint('term_id', 'bucket', name='termpop_by_year_pkey'),
+        {'schema': 'dwh'}
+    )
+
+    term_id = Column(Integer, ForeignKey('dwh.termpop_terms.id'), nullable=False)
+    bucket = Column(Date, nullable=False)
+    occurrence_count = Column(Integer, nullable=False)
+
+class TermPopByMonth(Base):
+    __tablename__ = 'termpop_by_month'
+    __table_args__ = (
+        PrimaryKeyConstraint('term_id', 'bucket', name='termpop_by_month_pkey'),
+        {'schema': 'dwh'}
+    )
+
+    term_id = Column(Integer, ForeignKey('dwh.termpop_terms.id'), nullable=False)
+    bucket = Column(Date, nullable=False)
+    occurrence_count = Column(Integer, nullable=False)
+
+class TermPopByWeek(Base):
+    __tablename__ = 'termpop_by_week'
+    __table_args__ = (
+        PrimaryKeyConstraint('term_id', 'bucket', name='termpop_by_week_pkey'),
+        {'schema': 'dwh'}
+    )
+
+    term_id = Column(Integer, ForeignKey('dwh.termpop_terms.id'), nullable=False)
+    bucket = Column(Date, nullable=False)
+    occurrence_count = Column(Integer, nullable=False)
+
+# Rollup table per aggregation level, the level is also its date_trunc unit
+TERMPOP_ROLLUPS = {
+    'year': TermPopByYear,
+    'month': TermPopByMonth,
+    'week': TermPopByWeek,
+}
+
+
+# Topicpop Topics
+class TopicPopTopic(Base):
+    __tablename__ = 'topicpop_topics'
+    __table_args__ = {'schema': 'dwh'}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    topic = Column(Text, nullable=False, unique=True)
+
+# Topicpop
+class TopicPop(Base):
+    __tablename__ = 'topicpop'
+    __table_args__ = {'schema': 'dwh'}
+
+    comment_id = Column(Integer, ForeignKey('raw.comments.id'), primary_key=True)
+    topic_id = Column(Integer, ForeignKey('dwh.topicpop_topics.id'), nullable=False)
+
+# Topicpop by Week, week as the date of its Monday
+class TopicPopByWeek(Base):
+    __tablename__ = 'topicpop_by_week'
+    __table_args__ = (
+        PrimaryKeyConstraint('topic_id', 'week', name='topicpop_by_week_pkey'),
+        {'schema': 'dwh'}
+    )
+
+    topic_id = Column(Integer, ForeignKey('dwh.topicpop_topics.id'), nullable=False)
+    week = Column(Date, nullable=False)
+    occurrence_count = Column(Integer, nullable=False)
+
+
+# ETL metrics, one row per stage and run
+class EtlMetric(Base):
+    __tablename__ = 'etl_metrics'
+    __table_args__ = {'schema': 'dwh'}
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Text, nullable=False)
+    stage = Column(Text, nullable=False)
+    status = Column(Text, nullable=False)
+    started_at = Column(TIMESTAMP, nullable=False)
+    seconds = Column(Float, nullable=False)
+    rows = Column(BigInteger)
+    rows_per_sec = Column(Float)
+    error = Column(Text)
+
+
+# Version stamps of the DWH datasets, bumped by the ETL with every commit of new data
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+    __table_args__ = {'schema': 'dwh'}
+
+    dataset = Column(Text, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(TIMESTAMP, nullable=False)
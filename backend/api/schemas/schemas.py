@@ -225,3 +225,14 @@ class TermPopAggInDBBase(TermPopAggBase):
 
 class TermPopAgg(TermPopAggInDBBase):
     pass
+
+
+# TermPop Series Pydantic Schemas
+class TermPopSeries(BaseModel):
+    # columnar, one shared time axis and one count vector per term aligned with it
+    agg: str
+    year: List[int]
+    month: Optional[List[int]] = None
+    week: Optional[List[int]] = None
+    term_ids: List[int]
+    counts: List[List[int]]
@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import multiprocessing
+import random
+import numpy as np
+import uvicorn
+from aiohttp import ClientSession, TCPConnector
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import List
+from time import perf_counter
+from backend.api.crud import crud
+from backend.api.database import get_db, get_session_factory
+from backend.api.models import models
+from backend.api.schemas import schemas
+from backend.benchmarks.scraper_benchmark import _free_port, _wait_for
+
+APPS = {
+    'sync': 'backend.benchmarks.api_benchmark:sync_app',
+    'async': 'backend.api.main:app',
+}
+
+# the endpoints as they were before the async database layer, blocking
+# sessions served from FastAPI's threadpool
+sync_app = FastAPI()
+
+
+@sync_app.get("/comment", response_model=schemas.CommentBase)
+def read_comment(db: Session = Depends(get_db), comment_id: int = 100000):
+    db_comment = crud.get_comment(db=db, comment_id=comment_id)
+    if db_comment is None:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return db_comment
+
+
+@sync_app.get("/termpop/agg", response_model=List[schemas.TermPopAggBase])
+def read_termpop_agg(term_id: int, agg: str = 'year', db: Session = Depends(get_db)):
+    data = crud.get_termpop_agg(db=db, term_id=term_id, agg=agg)
+    if not data:
+        raise HTTPException(status_code=404, detail="No data found for the specified term_id and aggregation.")
+    aggregations = []
+    for row in data:
+        aggregation_data = {'year': row[0], 'occurrence_count': row[-1]}
+        if agg in ('month', 'week'):
+            aggregation_data[agg] = row[1]
+        aggregations.append(schemas.TermPopAggBase(**aggregation_data))
+    return aggregations
+
+
+def _serve(app: str, port: int):
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning', access_log=False)
+
+
+def _requests(endpoint: str, terms: int = 1, seed: int = 0):
+    """Endless random query strings for an endpoint, drawn from the data in hndb."""
+    rng = random.Random(seed)
+    with get_session_factory()() as db:
+        low, high = db.execute(select(func.min(models.Comment.id), func.max(models.Comment.id))).one()
+        term_ids = db.execute(select(models.TermPopTerm.id)).scalars().all()
+    while True:
+        agg = rng.choice(list(models.TERMPOP_ROLLUPS))
+        if endpoint == 'comment':
+            yield f'/comment?comment_id={rng.randint(low, high)}'
+        elif endpoint == 'termpop':
+            yield f'/termpop/agg?term_id={rng.choice(term_ids)}&agg={agg}'
+        else:
+            sample = rng.sample(term_ids, min(terms, len(term_ids)))
+            yield f'/termpop/series?agg={agg}&' + '&'.join(f'term_ids={term_id}' for term_id in sample)
+
+
+async def _load(base_url: str, paths, concurrency: int, seconds: float):
+    """Keeps concurrency requests in flight for seconds, returns the latencies of the answered ones and the error count."""
+    latencies = []
+    errors = 0
+    deadline = perf_counter() + seconds
+
+    async def client(s):
+        nonlocal errors
+        while perf_counter() < deadline:
+            start = perf_counter()
+            async with s.get(base_url + next(paths)) as response:
+                await response.read()
+            # a missing comment id is an answer too, only server errors count
+            if response.status >= 500:
+                errors += 1
+            else:
+                latencies.append(perf_counter() - start)
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as s:
+        await asyncio.gather(*(client(s) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Requests/sec and p99 latency of the API, with blocking and with async database sessions.')
+    parser.add_argument('--apps', nargs='+', choices=APPS, default=list(APPS))
+    parser.add_argument('--endpoints', nargs='+', choices=['comment', 'termpop', 'series'], default=['comment', 'termpop'])
+    parser.add_argument('--series-terms', type=int, nargs='+', default=[1, 10, 50], help='term IDs per /termpop/series request')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--seconds', type=float, default=10.0, help='duration of every run, after a one second warm-up')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    print(f'{"app":>6} {"endpoint":>9} {"conc":>6} {"req/sec":>9} {"p99 ms":>8} {"errors":>7}')
+    for app in args.apps:
+        port = _free_port()
+        server = ctx.Process(target=_serve, args=(APPS[app], port), daemon=True)
+        server.start()
+        try:
+            _wait_for(port, timeout=30.0)
+            base_url = f'http://127.0.0.1:{port}'
+            # the blocking app predates /termpop/series
+            for endpoint in [endpoint for endpoint in args.endpoints if app == 'async' or endpoint != 'series']:
+                for terms in (args.series_terms if endpoint == 'series' else [1]):
+                    paths = _requests(endpoint, terms)
+                    label = f'series:{terms}' if endpoint == 'series' else endpoint
+                    for concurrency in args.concurrency:
+                        asyncio.run(_load(base_url, paths, concurrency, 1.0))
+                        latencies, errors = asyncio.run(_load(base_url, paths, concurrency, args.seconds))
+                        print(f'{app:>6} {label:>9} {concurrency:>6} {len(latencies) / args.seconds:>9,.0f} '
+                              f'{float(np.percentile(latencies, 99)) * 1000:>8.1f} {errors:>7}')
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
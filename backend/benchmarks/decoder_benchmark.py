@@ -0,0 +1,35 @@
+import argparse
+import json
+from time import perf_counter
+from backend.etl.scraper.decoders import available_decoders, make_decoder
+
+def synthetic_payloads(n: int):
+    payloads = []
+    for i in range(n):
+        if i % 10 == 0:
+            item = {'by': 'pg', 'descendants': 42, 'id': i, 'kids': list(range(i, i+42)), 'score': 120,
+                    'time': 1700000000 + i, 'title': f'Show HN: Project {i}', 'type': 'story', 'url': f'https://example.com/{i}'}
+        else:
+            item = {'by': 'dang', 'id': i, 'kids': [i+1, i+2], 'parent': i-1, 'time': 1700000000 + i, 'type': 'comment',
+                    'text': 'I&#x27;d argue &quot;it depends&quot;, see <a href="https:&#x2F;&#x2F;example.com">this</a>. ' * 4}
+        payloads.append(json.dumps(item).encode())
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report items/sec for every installed JSON decoder.')
+    parser.add_argument('--items', type=int, default=100000)
+    args = parser.parse_args()
+
+    payloads = synthetic_payloads(args.items)
+    print(f'{"decoder":>10} {"items/sec":>12}')
+    for name in available_decoders():
+        _, decode = make_decoder(name)
+        start = perf_counter()
+        for payload in payloads:
+            decode(payload)
+        print(f'{name:>10} {len(payloads) / (perf_counter() - start):>12,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import socket
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from aiohttp import web
+from sqlalchemy import create_engine
+from backend.etl.scraper.replay import ReplayServer, load_corpus, synthetic_corpus
+from backend.etl.scraper.scraper import Scraper
+
+
+class BenchmarkScraper(Scraper):
+    """Scraper recording per-request latency, database writes are optional."""
+    def __init__(self, write: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.write = write
+        self.latencies = []
+
+    async def _fetch(self, s, id):
+        start = perf_counter()
+        try:
+            return await super()._fetch(s, id)
+        finally:
+            self.latencies.append(perf_counter() - start)
+
+    async def _scrape_range(self, last_id, max_id, refresh_max):
+        if self.write:
+            return await super()._scrape_range(last_id, max_id, refresh_max)
+        # without writes there are no completed ranges to resume from
+        await self._scrape_ids(range(last_id + 1, max_id + 1))
+        return max_id
+
+    def _insert_sql(self, batch, ids, failed, last_id):
+        if self.write:
+            super()._insert_sql(batch, ids, failed, last_id)
+
+
+def _serve(path, port, latency, jitter, error_rate):
+    server = ReplayServer(load_corpus(path), latency=latency, jitter=jitter, error_rate=error_rate, seed=0)
+    web.run_app(server.app(), host='127.0.0.1', port=port, print=None, access_log=None)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(port, timeout=10.0):
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return
+        except OSError:
+            pass
+    raise TimeoutError(f'replay server on port {port} did not come up')
+
+
+def run_config(api_url: str, items: int, batch_size: int, concurrency: int, write: bool):
+    """Scrapes ids 1..items in a fresh process and returns its throughput, p99 latency and peak RSS."""
+    # without writes the engine is never connected, any URL will do
+    engine = None if write else create_engine('sqlite://')
+    scraper = BenchmarkScraper(
+        write=write,
+        batch_size=batch_size,
+        concurrency=concurrency,
+        connection_limit=concurrency,
+        retries=3,
+        backoff=0.01,
+        api_url=api_url,
+        engine=engine,
+    )
+    scraper.last_id, scraper.max_id = 0, items
+
+    async def scrape():
+        async with scraper:
+            await scraper.begin_scraping()
+
+    start = perf_counter()
+    asyncio.run(scrape())
+    elapsed = perf_counter() - start
+    return {
+        'items_per_sec': items / elapsed,
+        'p99_ms': float(np.percentile(scraper.latencies, 99)) * 1000,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scraper throughput against a local replay of the Hacker News API.')
+    parser.add_argument('--corpus', help='recorded corpus, a synthetic one is generated if omitted')
+    parser.add_argument('--items', type=int, default=20000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--latency', type=float, default=0.005, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.005, help='random extra seconds, uniform')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--write', action='store_true', help='also write batches to the hndb database')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.corpus
+        if path is None:
+            path = os.path.join(tmp, 'corpus.tsv.gz')
+            synthetic_corpus(path, args.items)
+        items = min(args.items, max(load_corpus(path)))
+
+        port = _free_port()
+        server = ctx.Process(target=_serve, args=(path, port, args.latency, args.jitter, args.error_rate), daemon=True)
+        server.start()
+        try:
+            _wait_for(port)
+            api_url = f'http://127.0.0.1:{port}/v0'
+            print(f'{"batch":>8} {"conc":>6} {"items/sec":>10} {"p99 ms":>8} {"peak RSS MB":>12}')
+            for batch_size in args.batch_sizes:
+                for concurrency in args.concurrency:
+                    # a fresh process per configuration keeps peak RSS comparable
+                    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                        result = executor.submit(run_config, api_url, items, batch_size, concurrency, args.write).result()
+                    print(f'{batch_size:>8} {concurrency:>6} {result["items_per_sec"]:>10,.0f} {result["p99_ms"]:>8.1f} {result["peak_rss_mb"]:>12.1f}')
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from time import perf_counter
+from backend.api.models.models import TermPopTerm
+from backend.benchmarks.scratch import create_scratch_schema, load_comments, scratch_url, synthetic_comments
+from backend.etl.dwh.update_dwh import populate_termpop_agg
+
+# a mix of frequent terms, rare ones and ones too short for the trigram index
+TERMS = ['python', 'rust', 'postgres', 'kubernetes', 'startup', 'haskell', 'llm', 'ai', 'yc']
+
+
+def _setup(engine, n, extra_terms):
+    create_scratch_schema(engine, 'termpop')
+    load_comments(engine, synthetic_comments(n, TERMS))
+    with engine.begin() as con:
+        terms = TERMS + [f'word{i}' for i in range(extra_terms)]
+        con.execute(TermPopTerm.__table__.insert(), [{'term': term} for term in terms])
+
+
+def _run(Session, method):
+    with Session() as db:
+        db.execute(text('TRUNCATE dwh.termpop_agg'))
+        db.execute(text('UPDATE dwh.termpop_terms SET last_comment_id = 0'))
+        db.commit()
+        start = perf_counter()
+        populate_termpop_agg(db, method=method)
+        elapsed = perf_counter() - start
+        total = db.execute(text('SELECT SUM(occurrence_count) FROM dwh.termpop_agg')).scalar()
+    return elapsed, total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the termpop backfill through ILIKE, the trigram index and the Aho-Corasick automaton. '
+                    'Drops and recreates the raw/dwh tables it uses, point it at a scratch database.'
+    )
+    parser.add_argument('--url', help='SQLAlchemy URL, defaults to BENCH_DB_URL or the hndb_bench database')
+    parser.add_argument('--comments', type=int, default=200000)
+    parser.add_argument('--extra-terms', type=int, default=0, help='additional rare terms, to see how each plan scales with the term count')
+    args = parser.parse_args()
+    url = args.url or scratch_url()
+
+    engine = create_engine(url)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    _setup(engine, args.comments, args.extra_terms)
+
+    with engine.begin() as con:
+        con.execute(text('DROP INDEX IF EXISTS raw.comments_text_trgm_idx'))
+    ilike, expected = _run(Session, 'sql')
+    automaton, total = _run(Session, 'automaton')
+    if total != expected:
+        raise SystemExit(f'occurrence totals differ: {expected} with ILIKE, {total} with the automaton')
+
+    start = perf_counter()
+    with engine.begin() as con:
+        con.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        con.execute(text('CREATE INDEX comments_text_trgm_idx ON raw.comments USING GIN (text gin_trgm_ops)'))
+        con.execute(text('ANALYZE raw.comments'))
+    build = perf_counter() - start
+    trigram, total = _run(Session, 'sql')
+    if total != expected:
+        raise SystemExit(f'occurrence totals differ: {expected} with ILIKE, {total} with the trigram index')
+
+    print(f'{args.comments:,} comments, {len(TERMS) + args.extra_terms} terms, {expected:,} occurrences')
+    print(f'{"plan":>9} {"seconds":>9} {"comments/sec":>13}')
+    for name, elapsed in (('ilike', ilike), ('trigram', trigram), ('automaton', automaton)):
+        print(f'{name:>9} {elapsed:>9.2f} {args.comments / elapsed:>13,.0f}')
+    print(f'trigram index build: {build:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
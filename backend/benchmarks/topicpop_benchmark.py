@@ -0,0 +1,52 @@
+import argparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from time import perf_counter
+from backend.benchmarks.scratch import create_scratch_schema, load_comments, scratch_url, synthetic_comments
+from backend.etl.dwh.topic_model import DEFAULT_TOPICS, KeywordModel, classify_batches
+from backend.etl.dwh.update_dwh import populate_topicpop
+
+
+def _classify(batches, workers):
+    model = KeywordModel()
+    start = perf_counter()
+    for _ in classify_batches(model, batches, workers):
+        pass
+    return perf_counter() - start
+
+
+def _stage(url, df, batch_size, workers):
+    engine = create_engine(url)
+    create_scratch_schema(engine, 'topicpop')
+    load_comments(engine, df)
+    with sessionmaker(bind=engine)() as db:
+        start = perf_counter()
+        populate_topicpop(db, batch_size=batch_size, workers=workers)
+        return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Topic classification throughput in comments/sec.')
+    parser.add_argument('--comments', type=int, default=200000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--db', action='store_true', help='also time the whole stage, reading and writing the database')
+    parser.add_argument('--url', help='SQLAlchemy URL of a scratch database, defaults to BENCH_DB_URL or hndb_bench')
+    args = parser.parse_args()
+
+    df = synthetic_comments(args.comments, [keyword for keywords in DEFAULT_TOPICS.values() for keyword in keywords])
+    rows = list(zip(df['id'].tolist(), df['text'].tolist()))
+    url = args.url or (args.db and scratch_url())
+
+    print(f'{"batch":>8} {"workers":>8} {"classify/sec":>13}' + (f' {"stage/sec":>13}' if args.db else ''))
+    for batch_size in args.batch_sizes:
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        for workers in args.workers:
+            line = f'{batch_size:>8} {workers:>8} {args.comments / _classify(batches, workers):>13,.0f}'
+            if args.db:
+                line += f' {args.comments / _stage(url, df, batch_size, workers):>13,.0f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import html
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from time import perf_counter
+from backend.etl.scraper.transform import sanitize_text, epoch_to_datetime
+
+
+def synthetic_items(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    texts = np.array([
+        'Plain comment without entities',
+        'I&#x27;d say &quot;it depends&quot; &gt; anything else',
+        'Line one<p>Line two with a <a href="https:&#x2F;&#x2F;example.com">link</a>',
+        'Caf&eacute; &amp; r&#233;sum&#xE9; with a stray \x00 byte',
+        None,
+    ], dtype=object)
+    # consecutive ids are posted within a day or two of each other
+    start = int(rng.integers(1.1e9, 1.7e9))
+    return {
+        'text': texts[rng.integers(0, len(texts), size=n)],
+        'time': np.sort(rng.integers(start, start + 2 * 86400, size=n)),
+    }
+
+
+def per_item(items):
+    # the transform _to_dict used to apply to every item
+    texts, times = [], []
+    for text, time in zip(items['text'], items['time']):
+        try:
+            texts.append(html.unescape(text).replace('\\x00', '').replace('\x00', ''))
+        except TypeError:
+            texts.append(np.nan)
+        times.append(datetime.fromtimestamp(int(time)))
+        datetime.now()
+    return texts, times
+
+
+def per_column(items):
+    sanitize_text(pd.Series(items['text'], dtype=object))
+    epoch_to_datetime(pd.Series(items['time']))
+    datetime.now()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-item and per-column text/timestamp transforms.')
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f'{"items":>8} {"per_item":>12} {"per_column":>12}  (usec/item)')
+    for n in args.items:
+        items = synthetic_items(n)
+        costs = []
+        for transform in (per_item, per_column):
+            start = perf_counter()
+            transform(items)
+            costs.append((perf_counter() - start) / n * 1e6)
+        print(f'{n:>8} ' + ' '.join(f'{cost:>12.2f}' for cost in costs))
+
+
+if __name__ == '__main__':
+    main()
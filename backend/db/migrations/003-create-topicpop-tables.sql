@@ -12,7 +12,7 @@ CREATE TABLE dwh.topicpop (
     comment_id INTEGER NOT NULL,
     topic_id INTEGER NOT NULL,
   	PRIMARY KEY (comment_id),
-    FOREIGN KEY (topic_id) REFERENCES dwh.topicpop_topics (id)
+    FOREIGN KEY (topic_id) REFERENCES dwh.topicpop_topics (id),
     FOREIGN KEY (comment_id) REFERENCES raw.comments (id)
 );
 
@@ -0,0 +1,13 @@
+DROP TABLE IF EXISTS raw.scrape_shards CASCADE;
+
+CREATE TABLE raw.scrape_shards (
+    id SERIAL,
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    last_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    CHECK (start_id <= end_id),
+    CHECK (last_id BETWEEN start_id - 1 AND end_id)
+);
+
+CREATE INDEX scrape_shards_unfinished_idx ON raw.scrape_shards (id) WHERE last_id < end_id;
@@ -0,0 +1,27 @@
+DROP TABLE IF EXISTS raw.scrape_ranges CASCADE;
+
+CREATE TABLE raw.scrape_ranges (
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    PRIMARY KEY (start_id),
+    CHECK (start_id <= end_id)
+);
+
+CREATE INDEX scrape_ranges_end_id_idx ON raw.scrape_ranges (end_id);
+
+
+-- seed the completed ranges from everything scraped so far. raw.skipped is
+-- left out, next to ids without an item it holds ids whose fetch failed for
+-- good, and those have to stay gaps for the backfill
+INSERT INTO raw.scrape_ranges (start_id, end_id)
+SELECT
+    MIN(id) AS start_id,
+    MAX(id) AS end_id
+FROM (
+    SELECT
+        id,
+        id - ROW_NUMBER() OVER (ORDER BY id) AS island
+    FROM raw.scrape
+) islands
+GROUP BY
+    island;
@@ -0,0 +1,6 @@
+ALTER TABLE dwh.termpop_terms
+    ADD COLUMN last_comment_id INTEGER NOT NULL DEFAULT 0;
+
+-- existing aggregates were built without a watermark, the next ETL run
+-- rebuilds them incrementally starting from comment 0
+TRUNCATE dwh.termpop_agg;
@@ -0,0 +1,6 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- lets the termpop ETL match ILIKE '%term%' through the index instead of
+-- scanning every comment, built concurrently so the scraper keeps inserting
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_text_trgm_idx
+    ON raw.comments USING GIN (text gin_trgm_ops);
@@ -0,0 +1,20 @@
+-- 003 stopped at a missing comma, databases migrated with it have no dwh.topicpop
+CREATE TABLE IF NOT EXISTS dwh.topicpop (
+    comment_id INTEGER NOT NULL,
+    topic_id INTEGER NOT NULL,
+  	PRIMARY KEY (comment_id),
+    FOREIGN KEY (topic_id) REFERENCES dwh.topicpop_topics (id),
+    FOREIGN KEY (comment_id) REFERENCES raw.comments (id)
+);
+
+-- the ETL registers the topics of its model by name
+ALTER TABLE dwh.topicpop_topics
+    ADD CONSTRAINT topicpop_topics_topic_key UNIQUE (topic);
+
+-- week numbers repeat every year, buckets are keyed by ISO year and week;
+-- nothing filled the table so far, the ETL rolls it up from dwh.topicpop
+TRUNCATE dwh.topicpop_by_week;
+ALTER TABLE dwh.topicpop_by_week
+    ADD COLUMN year SMALLINT NOT NULL,
+    DROP CONSTRAINT topicpop_by_week_pkey,
+    ADD PRIMARY KEY (topic_id, year, week);
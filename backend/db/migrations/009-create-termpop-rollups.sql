@@ -0,0 +1,46 @@
+DROP TABLE IF EXISTS dwh.termpop_by_year CASCADE;
+DROP TABLE IF EXISTS dwh.termpop_by_month CASCADE;
+DROP TABLE IF EXISTS dwh.termpop_by_week CASCADE;
+
+-- termpop_agg summed up to each grain the API serves, refreshed by the ETL
+-- in the same transaction as termpop_agg itself
+CREATE TABLE dwh.termpop_by_year (
+    term_id INTEGER NOT NULL,
+    year SMALLINT NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, year),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+CREATE TABLE dwh.termpop_by_month (
+    term_id INTEGER NOT NULL,
+    year SMALLINT NOT NULL,
+    month SMALLINT NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, year, month),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+CREATE TABLE dwh.termpop_by_week (
+    term_id INTEGER NOT NULL,
+    year SMALLINT NOT NULL,
+    week SMALLINT NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, year, week),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+INSERT INTO dwh.termpop_by_year (term_id, year, occurrence_count)
+SELECT term_id, year, SUM(occurrence_count)
+FROM dwh.termpop_agg
+GROUP BY term_id, year;
+
+INSERT INTO dwh.termpop_by_month (term_id, year, month, occurrence_count)
+SELECT term_id, year, month, SUM(occurrence_count)
+FROM dwh.termpop_agg
+GROUP BY term_id, year, month;
+
+INSERT INTO dwh.termpop_by_week (term_id, year, week, occurrence_count)
+SELECT term_id, year, week, SUM(occurrence_count)
+FROM dwh.termpop_agg
+GROUP BY term_id, year, week;
@@ -0,0 +1,62 @@
+-- the DWH buckets become single DATE keys (see backend/api/models/buckets.py):
+-- termpop_agg by the part of an ISO week inside one month, the rollups and
+-- topicpop_by_week by the first day of their year, month or ISO week
+
+-- the old rows paired calendar years with ISO weeks and cannot be converted,
+-- the next ETL run recounts every term
+DROP TABLE IF EXISTS dwh.termpop_agg CASCADE;
+DROP TABLE IF EXISTS dwh.termpop_by_year CASCADE;
+DROP TABLE IF EXISTS dwh.termpop_by_month CASCADE;
+DROP TABLE IF EXISTS dwh.termpop_by_week CASCADE;
+
+CREATE TABLE dwh.termpop_agg (
+    term_id INTEGER NOT NULL,
+    bucket DATE NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, bucket),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+CREATE TABLE dwh.termpop_by_year (
+    term_id INTEGER NOT NULL,
+    bucket DATE NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, bucket),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+CREATE TABLE dwh.termpop_by_month (
+    term_id INTEGER NOT NULL,
+    bucket DATE NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, bucket),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+CREATE TABLE dwh.termpop_by_week (
+    term_id INTEGER NOT NULL,
+    bucket DATE NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, bucket),
+    FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+);
+
+UPDATE dwh.termpop_terms SET last_comment_id = 0;
+
+-- topic assignments are kept, the weekly counts are rolled up again from them
+DROP TABLE IF EXISTS dwh.topicpop_by_week CASCADE;
+
+CREATE TABLE dwh.topicpop_by_week (
+    topic_id INTEGER NOT NULL,
+    week DATE NOT NULL,
+    occurrence_count INTEGER NOT NULL,
+    PRIMARY KEY (topic_id, week),
+    FOREIGN KEY (topic_id) REFERENCES dwh.topicpop_topics (id)
+);
+
+INSERT INTO dwh.topicpop_by_week (topic_id, week, occurrence_count)
+SELECT p.topic_id, date_trunc('week', c.time)::date, COUNT(*)
+FROM dwh.topicpop p
+JOIN raw.comments c ON c.id = p.comment_id
+WHERE c.time IS NOT NULL
+GROUP BY 1, 2;
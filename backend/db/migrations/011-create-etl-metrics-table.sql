@@ -0,0 +1,19 @@
+DROP TABLE IF EXISTS dwh.etl_metrics CASCADE;
+
+-- one row per stage and ETL run, written by backend/run_etl.py
+CREATE TABLE dwh.etl_metrics (
+    id SERIAL,
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    seconds DOUBLE PRECISION NOT NULL,
+    rows BIGINT,
+    rows_per_sec DOUBLE PRECISION,
+    error TEXT,
+    PRIMARY KEY (id),
+    CHECK (status IN ('ok', 'failed', 'skipped'))
+);
+
+-- a stage's history, to spot the run where it got slower
+CREATE INDEX etl_metrics_stage_started_at_idx ON dwh.etl_metrics (stage, started_at);
@@ -0,0 +1,13 @@
+DROP TABLE IF EXISTS dwh.data_versions CASCADE;
+
+-- one row per DWH dataset, the ETL bumps the version in the same transaction
+-- that commits new data, the API derives cache keys and ETags from it
+CREATE TABLE dwh.data_versions (
+    dataset TEXT NOT NULL,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (dataset)
+);
+
+INSERT INTO dwh.data_versions (dataset, version, updated_at)
+VALUES ('termpop', 1, timezone('utc', now())), ('topicpop', 1, timezone('utc', now()));
@@ -0,0 +1,35 @@
+DROP TABLE IF EXISTS raw.failed CASCADE;
+
+-- ids whose fetch failed, kept apart from raw.skipped so they stay gaps in
+-- raw.scrape_ranges and get backfilled. status is the last HTTP status, NULL
+-- for network errors and undecodable payloads. A 4xx other than 429 or too
+-- many failed attempts make a failure permanent.
+CREATE TABLE raw.failed (
+    item INTEGER NOT NULL,
+    status INTEGER,
+    attempts INTEGER NOT NULL,
+    permanent BOOLEAN NOT NULL,
+    failed_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (item)
+);
+
+-- raw.skipped used to hold failed ids next to the ids without an item, they
+-- cannot be told apart, so every skipped id is dropped and left to the
+-- backfill, which records it again as skipped or as failed
+DELETE FROM raw.skipped;
+
+-- the completed ranges are seeded anew from the items that did arrive
+DELETE FROM raw.scrape_ranges;
+
+INSERT INTO raw.scrape_ranges (start_id, end_id)
+SELECT
+    MIN(id) AS start_id,
+    MAX(id) AS end_id
+FROM (
+    SELECT
+        id,
+        id - ROW_NUMBER() OVER (ORDER BY id) AS island
+    FROM raw.scrape
+) islands
+GROUP BY
+    island;
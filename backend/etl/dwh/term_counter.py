@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from backend.api.models.buckets import bucket_of_days
+
+# optional C implementation of the automaton, the pure-Python one is used otherwise
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick automaton over a list of patterns."""
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.goto[node][char] = child
+                node = child
+            self.out[node] += (index,)
+
+        # breadth first, so the fail target of a node is always finished before the node itself
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                target = self.fail[node]
+                while target and char not in self.goto[target]:
+                    target = self.fail[target]
+                self.fail[child] = self.goto[target].get(char, 0)
+                self.out[child] += self.out[self.fail[child]]
+
+    def find(self, text: str):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        found = set()
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+def _pyahocorasick(patterns):
+    automaton = ahocorasick.Automaton()
+    for index, pattern in enumerate(patterns):
+        automaton.add_word(pattern, index)
+    automaton.make_automaton()
+
+    def find(text: str):
+        return {index for _, index in automaton.iter(text)}
+    return find
+
+
+class TermMatcher:
+    """
+    Finds which terms occur in a text, case-insensitively and each term at
+    most once, like `text ILIKE '%' || term || '%'` does per term.
+
+    All terms are matched in one pass over the text, so the cost grows with
+    the text length and not with the number of terms. Unlike ILIKE, '%' and
+    '_' inside a term are matched literally.
+    """
+    def __init__(self, terms, backend: str = None):
+        if backend is None:
+            backend = 'pyahocorasick' if ahocorasick is not None else 'python'
+        if backend == 'pyahocorasick' and ahocorasick is None:
+            raise ValueError('pyahocorasick is not installed')
+        if backend not in ('pyahocorasick', 'python'):
+            raise ValueError(f'Unknown automaton backend {backend!r}')
+        self.backend = backend
+
+        # duplicate terms share one pattern, an empty term matches every text
+        # and a NULL one none
+        patterns = {}
+        self.always = []
+        for index, term in enumerate(terms):
+            if term is None:
+                continue
+            pattern = term.lower()
+            if pattern:
+                patterns.setdefault(pattern, []).append(index)
+            else:
+                self.always.append(index)
+        self.term_indices = list(patterns.values())
+        if not patterns:
+            # pyahocorasick refuses to build an empty automaton
+            self.find = lambda text: ()
+        elif backend == 'pyahocorasick':
+            self.find = _pyahocorasick(list(patterns))
+        else:
+            self.find = _Automaton(list(patterns)).find
+
+    def match(self, text: str):
+        """Returns the indices of the terms occurring in text."""
+        matched = list(self.always)
+        for pattern in self.find(text.lower()):
+            matched.extend(self.term_indices[pattern])
+        return matched
+
+
+class TermCounter:
+    """
+    Accumulates the number of comments per term and date bucket, the same
+    buckets dwh.termpop_agg uses.
+
+    Args:
+        terms (list[str]): Terms to count.
+        watermarks (list[int]): Per term, only comments with a higher ID are counted.
+        backend (str): 'pyahocorasick' or 'python', defaults to the faster one installed.
+    """
+    def __init__(self, terms, watermarks, backend: str = None):
+        self.matcher = TermMatcher(terms, backend)
+        self.watermarks = np.asarray(watermarks, dtype=np.int64)
+        self.keys = []
+        self.columns = {}
+        self.counts = np.zeros((len(terms), 64), dtype=np.int32)
+
+    def _column(self, key: int):
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = len(self.keys)
+            self.keys.append(key)
+            if column == self.counts.shape[1]:
+                self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)], axis=1)
+        return column
+
+    def add(self, ids, times, texts):
+        """
+        Counts one chunk of comments.
+
+        Args:
+            ids (Sequence[int]): Comment IDs.
+            times (Sequence[datetime]): Comment timestamps, NULLs are skipped.
+            texts (Sequence[str]): Comment texts, NULLs are skipped.
+        """
+        match = self.matcher.match
+        rows, terms = [], []
+        for row, text in enumerate(texts):
+            if text is None:
+                continue
+            matched = match(text)
+            rows.extend([row] * len(matched))
+            terms.extend(matched)
+        if not rows:
+            return
+
+        rows = np.array(rows, dtype=np.intp)
+        terms = np.array(terms, dtype=np.intp)
+        times = pd.DatetimeIndex(times)
+        ids = np.asarray(ids, dtype=np.int64)
+        keep = (ids[rows] > self.watermarks[terms]) & ~times.isna()[rows]
+        rows, terms = rows[keep], terms[keep]
+
+        # buckets as days since the epoch
+        keys = bucket_of_days(times[rows].to_numpy(dtype='datetime64[D]')).astype(np.int64)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        columns = np.array([self._column(key) for key in unique.tolist()], dtype=np.intp)
+        np.add.at(self.counts, (terms, columns[inverse]), 1)
+
+    def to_frame(self, term_ids):
+        """Returns the non-zero counts as termpop_agg rows, term_ids maps term index to ID."""
+        terms, columns = np.nonzero(self.counts[:, :len(self.keys)])
+        keys = np.array(self.keys, dtype=np.int64)[columns]
+        return pd.DataFrame({
+            'term_id': np.asarray(term_ids, dtype=np.int64)[terms],
+            'bucket': pd.Series(keys.astype('datetime64[D]')).dt.date,
+            'occurrence_count': self.counts[terms, columns],
+        })
@@ -0,0 +1,99 @@
+import re
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# topic name to the keywords that vote for it
+DEFAULT_TOPICS = {
+    'AI': ['ai', 'ml', 'llm', 'llms', 'gpt', 'chatgpt', 'openai', 'neural', 'transformer', 'transformers', 'copilot'],
+    'Crypto': ['crypto', 'bitcoin', 'btc', 'ethereum', 'blockchain', 'nft', 'nfts', 'web3', 'defi'],
+    'Languages': ['python', 'rust', 'golang', 'java', 'haskell', 'lisp', 'javascript', 'typescript', 'c++', 'kotlin', 'swift', 'ocaml', 'elixir'],
+    'Startups': ['startup', 'startups', 'founder', 'founders', 'vc', 'vcs', 'funding', 'yc', 'investors', 'seed'],
+    'Infrastructure': ['kubernetes', 'docker', 'aws', 'cloud', 'postgres', 'database', 'linux', 'server', 'servers', 'kafka'],
+    'Hardware': ['cpu', 'gpu', 'chip', 'chips', 'intel', 'amd', 'arm', 'nvidia', 'risc'],
+    'Security': ['security', 'vulnerability', 'encryption', 'malware', 'password', 'passwords', 'exploit', 'cve'],
+    'Careers': ['job', 'jobs', 'salary', 'interview', 'hiring', 'remote', 'manager', 'layoffs'],
+}
+
+# keyword boundaries, so that 'ai' does not match inside 'email' but 'c++' still matches
+_WORD_CHARS = 'a-z0-9+#'
+
+
+class KeywordModel:
+    """
+    Assigns every text the topic whose keywords occur most often in it, ties
+    go to the topic listed first and texts without any keyword get none.
+
+    Args:
+        topics (dict): Topic name to keywords, defaults to DEFAULT_TOPICS.
+    """
+    def __init__(self, topics: dict = None):
+        topics = DEFAULT_TOPICS if topics is None else topics
+        self.topics = list(topics)
+        # a keyword listed under several topics votes for the first one
+        self.vocabulary = {}
+        for index, keywords in enumerate(topics.values()):
+            for keyword in keywords:
+                self.vocabulary.setdefault(keyword.lower(), index)
+        alternatives = '|'.join(re.escape(keyword) for keyword in sorted(self.vocabulary, key=len, reverse=True))
+        self.pattern = re.compile(f'(?<![{_WORD_CHARS}])(?:{alternatives})(?![{_WORD_CHARS}])')
+
+    def predict(self, texts):
+        """
+        Returns an array with the topic index of every text, -1 for none.
+
+        The keyword occurrences of the whole batch are collected first and
+        counted into a (text x topic) matrix in one go.
+        """
+        vocabulary = self.vocabulary
+        findall = self.pattern.findall
+        docs, topics = [], []
+        for doc, text in enumerate(texts):
+            if not text:
+                continue
+            hits = findall(text.lower())
+            docs.extend([doc] * len(hits))
+            topics.extend(vocabulary[hit] for hit in hits)
+
+        scores = np.zeros((len(texts), max(len(self.topics), 1)), dtype=np.int32)
+        np.add.at(scores, (np.array(docs, dtype=np.intp), np.array(topics, dtype=np.intp)), 1)
+        best = scores.argmax(axis=1)
+        best[scores.max(axis=1) == 0] = -1
+        return best
+
+
+_model = None
+
+
+def _init_worker(model):
+    global _model
+    _model = model
+
+
+def _predict(texts):
+    return _model.predict(texts)
+
+
+def classify_batches(model, batches, workers: int = 1):
+    """
+    Yields (batch, topics) for every batch of (id, text) rows, in order.
+
+    With more than one worker the batches are classified on a process pool
+    that holds the model, up to two batches per worker are in flight so the
+    next ones are read while the current ones are written.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield batch, model.predict([text for _, text in batch])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, executor.submit(_predict, [text for _, text in batch])))
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
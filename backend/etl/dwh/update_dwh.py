@@ -1,58 +1,455 @@
+import re
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from backend.api.models.models import TermPopTerm, TermPopAgg, Comment
+from sqlalchemy import create_engine, func, select, text, table, column
+from sqlalchemy.pool import NullPool
+from sqlalchemy.dialects.postgresql import insert
+from backend.api.models import buckets
+from backend.api.models.models import TERMPOP_ROLLUPS, TermPopTerm, TermPopAgg, Comment, DataVersion, TopicPop, TopicPopByWeek, TopicPopTopic
+from backend.etl.dwh.term_counter import TermCounter
+from backend.etl.dwh.topic_model import KeywordModel, classify_batches
+from backend.etl.scraper.loader import write_frame
 
-def populate_termpop_agg(db: Session):
+# 'sql' joins terms and comments in the database, 'automaton' streams the
+# comments once and matches every term in Python
+TERMPOP_METHODS = ('sql', 'automaton')
+
+# comments fetched per round trip of the server-side cursor
+STREAM_CHUNKSIZE = 10000
+
+AGG_COLUMNS = ['term_id', 'bucket', 'occurrence_count']
+
+# a rebuild fills this copy of dwh.termpop_agg and swaps it in when done
+STAGING_TABLE = table('termpop_agg_staging', *(column(name) for name in AGG_COLUMNS), schema='dwh')
+
+# terms worth counting, an empty term would match every comment and a NULL
+# one none, the comparison is false for both
+COUNTED_TERM = TermPopTerm.term != ''
+
+# pg_trgm extracts no trigrams from a pattern without three word characters
+# in a row, such terms would turn the index lookup into a full index scan
+INDEXABLE_TERM = re.compile(r'[^\W_]{3}')
+
+
+def get_settled_comment_id(db: Session):
     """
-    Populates the dwh.termpop_agg table with aggregated term occurrence data.
-    
-    Args:
-        db (Session): SQLAlchemy database session.
+    Returns the highest comment ID below which no more comments can arrive.
+
+    Comments are not inserted in ID order: scraper shards run in parallel and
+    failed IDs are backfilled later. Everything below the first gap in
+    raw.scrape_ranges that still has IDs to retry is final, anything above
+    may still fill in, so watermarks never move past that point. Gaps made
+    only of IDs that failed for good in raw.failed will never fill in and do
+    not hold the watermarks back.
     """
-    # Step 1: Delete all existing records from TermPopAgg
-    db.query(TermPopAgg).delete()
-    db.commit()  # Commit the deletion to the database
-
-    # Step 2: Aggregate data and prepare for insertion
-    # Build the query to aggregate occurrences of terms in comments
-    aggregated_data = (
-        db.query(
-            TermPopTerm.id.label('term_id'),
-            extract('year', Comment.time).label('year'),
-            extract('month', Comment.time).label('month'),
-            extract('week', Comment.time).label('week'),
-            func.count('*').label('occurrence_count')
+    settled_query = text("""
+    WITH gaps AS (
+        SELECT
+            COALESCE(prev_end, 0) + 1 AS start_id,
+            start_id - 1 AS end_id
+        FROM (
+            SELECT
+                start_id,
+                LAG(end_id) OVER (ORDER BY start_id) AS prev_end
+            FROM raw.scrape_ranges
+        ) ranges
+        WHERE start_id > COALESCE(prev_end, 0) + 1
+    )
+    SELECT COALESCE(LEAST(
+        (SELECT MAX(id) FROM raw.comments),
+        COALESCE(
+            (SELECT MIN(start_id) - 1
+             FROM gaps
+             WHERE (SELECT COUNT(*)
+                    FROM raw.failed
+                    WHERE permanent AND item BETWEEN gaps.start_id AND gaps.end_id)
+                   < gaps.end_id - gaps.start_id + 1),
+            (SELECT MAX(end_id) FROM raw.scrape_ranges)
         )
-        .join(Comment, Comment.text.ilike(func.concat('%', TermPopTerm.term, '%')))
-        .group_by(
+    ), 0)
+    """)
+    return db.execute(settled_query).scalar()
+
+
+def has_trigram_index(db: Session):
+    """Checks whether raw.comments.text has a pg_trgm GIN index (migration 007)."""
+    index_query = text("""
+    SELECT EXISTS (
+        SELECT 1
+        FROM pg_indexes
+        WHERE schemaname = 'raw'
+          AND tablename = 'comments'
+          AND indexdef LIKE '%gin_trgm_ops%'
+    )
+    """)
+    return db.execute(index_query).scalar()
+
+
+def bump_data_version(db: Session, dataset: str):
+    """
+    Marks a dataset as changed for the API's caches and ETags, in the
+    caller's transaction so the new version commits together with the data.
+    """
+    stmt = insert(DataVersion).values(dataset=dataset, version=1, updated_at=func.timezone('utc', func.now()))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['dataset'],
+        set_={'version': DataVersion.version + 1, 'updated_at': stmt.excluded.updated_at}
+    ))
+
+
+def _upsert_counts(counts, target=TermPopAgg.__table__):
+    # adds counted deltas to the existing rows instead of replacing them
+    stmt = insert(target).from_select(AGG_COLUMNS, counts)
+    return stmt.on_conflict_do_update(
+        index_elements=AGG_COLUMNS[:-1],
+        set_={'occurrence_count': target.c.occurrence_count + stmt.excluded.occurrence_count}
+    )
+
+
+def _aggregate_terms(term_ids, after_id: int, until_id: int):
+    bucket = buckets.bucket_of(Comment.time)
+    return (
+        select(
             TermPopTerm.id,
-            extract('year', Comment.time),
-            extract('month', Comment.time),
-            extract('week', Comment.time)
+            bucket,
+            func.count('*')
         )
-        .order_by(
-            TermPopTerm.id,
-            extract('year', Comment.time),
-            extract('month', Comment.time),
-            extract('week', Comment.time)
+        .select_from(TermPopTerm)
+        .join(Comment, Comment.text.ilike(func.concat('%', TermPopTerm.term, '%')))
+        .where(
+            TermPopTerm.id.in_(term_ids),
+            Comment.id > after_id,
+            Comment.id <= until_id
         )
+        .group_by(TermPopTerm.id, bucket)
     )
 
-    # Execute the query and fetch all results
-    results = aggregated_data.all()
 
-    # Step 3: Create TermPopAgg instances for bulk insertion
-    term_pop_agg_entries = [
-        TermPopAgg(
-            term_id=row.term_id,
-            year=int(row.year),
-            month=int(row.month),
-            week=int(row.week),
-            occurrence_count=row.occurrence_count
+def _execute(db: Session, stmt, use_index: bool = True):
+    if use_index:
+        return db.execute(stmt)
+    db.execute(text('SET LOCAL enable_bitmapscan = off'))
+    result = db.execute(stmt)
+    db.execute(text('RESET enable_bitmapscan'))
+    return result
+
+
+def _group_terms(db: Session, terms):
+    # group by watermark and, with a trigram index, by whether the index can
+    # serve the pattern; the planner picks it on its own for large ranges
+    trigram_index = has_trigram_index(db)
+    groups = {}
+    for term_id, term, last_comment_id in terms:
+        use_index = not trigram_index or bool(INDEXABLE_TERM.search(term))
+        groups.setdefault((last_comment_id, use_index), []).append(term_id)
+    return groups
+
+
+def _count_terms(db: Session, terms, until_id: int, target):
+    # insert-from-select, the aggregated rows never leave the database
+    for (last_comment_id, use_index), term_ids in _group_terms(db, terms).items():
+        _execute(db, _upsert_counts(_aggregate_terms(term_ids, last_comment_id, until_id), target), use_index)
+
+
+def _load_counts(db: Session, counts: pd.DataFrame, target):
+    # bulk load the counts into a scratch table, then upsert them in one statement
+    db.execute(text('CREATE TEMPORARY TABLE termpop_delta (LIKE dwh.termpop_agg) ON COMMIT DROP'))
+    write_frame(counts, 'termpop_delta', db.connection(), schema=None)
+    delta = table('termpop_delta', *(column(name) for name in AGG_COLUMNS))
+    db.execute(_upsert_counts(select(*delta.columns), target))
+
+
+def _stream_counts(db: Session, terms, after_id: int, until_id: int, chunk_size: int = STREAM_CHUNKSIZE):
+    # one pass over the comments in the range, whatever the number of terms
+    term_ids, term_texts, watermarks = zip(*terms)
+    counter = TermCounter(term_texts, watermarks)
+    comments = (
+        select(Comment.id, Comment.time, Comment.text)
+        .where(Comment.id > after_id, Comment.id <= until_id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for rows in db.execute(comments).partitions():
+        counter.add(*zip(*rows))
+    return counter.to_frame(term_ids)
+
+
+def _count_terms_automaton(db: Session, terms, until_id: int, target):
+    _load_counts(db, _stream_counts(db, terms, min(wm for _, _, wm in terms), until_id), target)
+
+
+def count_chunk(url: str, method: str, terms, after_id: int, until_id: int):
+    """
+    Worker process entry point, returns the partial termpop_agg counts of the
+    comments after_id < id <= until_id without writing anything.
+
+    Args:
+        url (str): Database URL, every worker connects on its own.
+        method (str): One of TERMPOP_METHODS.
+        terms (list[tuple]): (id, term, last_comment_id) of the terms to count.
+        after_id (int): Exclusive lower comment ID bound.
+        until_id (int): Inclusive upper comment ID bound.
+    """
+    engine = create_engine(url, poolclass=NullPool)
+    with Session(engine) as db:
+        if method == 'automaton':
+            return _stream_counts(db, terms, after_id, until_id)
+        partials = []
+        for (last_comment_id, use_index), term_ids in _group_terms(db, terms).items():
+            if last_comment_id >= until_id:
+                continue
+            rows = _execute(db, _aggregate_terms(term_ids, max(last_comment_id, after_id), until_id), use_index)
+            partials.append(pd.DataFrame(rows.all(), columns=AGG_COLUMNS))
+        return pd.concat(partials, ignore_index=True) if partials else pd.DataFrame(columns=AGG_COLUMNS)
+
+
+def _count_terms_parallel(db: Session, method: str, terms, until_id: int, target, workers: int, chunk_size: int, verbose: bool):
+    url = db.get_bind().url.render_as_string(hide_password=False)
+    after_id = min(wm for _, _, wm in terms)
+    chunks = [(start, min(start + chunk_size, until_id)) for start in range(after_id, until_id, chunk_size)]
+    partials = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(count_chunk, url, method, terms, start, end): (start, end) for start, end in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            partials.append(future.result())
+            if verbose:
+                start, end = futures[future]
+                print(f'Counted comments {start + 1}..{end}, {done} of {len(chunks)} chunks done')
+
+    # chunks split buckets at their edges, the partial counts are summed per key
+    counts = pd.concat(partials, ignore_index=True)
+    counts = counts.groupby(AGG_COLUMNS[:-1], as_index=False)['occurrence_count'].sum()
+    _load_counts(db, counts.astype({'occurrence_count': 'int64'}), target)
+
+
+def _add_counts(db: Session, method: str, terms, until_id: int, target, workers: int, chunk_size: int, verbose: bool):
+    if workers > 1:
+        _count_terms_parallel(db, method, terms, until_id, target, workers, chunk_size, verbose)
+    elif method == 'automaton':
+        _count_terms_automaton(db, terms, until_id, target)
+    else:
+        _count_terms(db, terms, until_id, target)
+
+
+def _refresh_rollups(db: Session, term_ids):
+    # recomputed from termpop_agg, a handful of rows per term and week
+    for grain, rollup in TERMPOP_ROLLUPS.items():
+        db.query(rollup).filter(rollup.term_id.in_(term_ids)).delete(synchronize_session=False)
+        bucket = buckets.truncate(grain, TermPopAgg.bucket)
+        summed = (
+            select(TermPopAgg.term_id, bucket, func.sum(TermPopAgg.occurrence_count))
+            .where(TermPopAgg.term_id.in_(term_ids))
+            .group_by(TermPopAgg.term_id, bucket)
         )
-        for row in results
-    ]
+        db.execute(insert(rollup).from_select(AGG_COLUMNS, summed))
+
+
+def _count_comments(db: Session, after_id: int, until_id: int):
+    return db.query(func.count(Comment.id)).filter(Comment.id > after_id, Comment.id <= until_id).scalar()
+
+
+def populate_termpop_agg(
+        db: Session,
+        method: str = 'sql',
+        workers: int = 1,
+        chunk_size: int = 1000000,
+        verbose: bool = False
+        ):
+    """
+    Incrementally updates the dwh.termpop_agg table with aggregated term occurrence data.
+
+    Every term stores the ID of the last comment it was counted against. Only
+    comments past that watermark are scanned and their counts are added to the
+    existing rows, so a newly added term (watermark 0) is the only one that
+    needs a full pass over raw.comments.
+
+    With more than one worker the comment ID range is split into chunks that a
+    process pool counts independently, the merged counts and the new watermarks
+    are still written in this session's single transaction.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        method (str): How terms are matched, one of TERMPOP_METHODS.
+        workers (int): Worker processes, 1 counts in this process.
+        chunk_size (int): Comment IDs per chunk when counting in parallel.
+        verbose (bool): Report progress per chunk.
+
+    Returns:
+        int: Number of comments scanned.
+    """
+    if method not in TERMPOP_METHODS:
+        raise ValueError(f'Unknown termpop method {method!r}, available: {TERMPOP_METHODS}')
+    settled_id = get_settled_comment_id(db)
+
+    # Step 1: Find the terms that are behind
+    terms = (
+        db.query(TermPopTerm.id, TermPopTerm.term, TermPopTerm.last_comment_id)
+        .filter(TermPopTerm.last_comment_id < settled_id, COUNTED_TERM)
+        .all()
+    )
+    if not terms:
+        return 0
+    terms = [tuple(term) for term in terms]
+    comments = _count_comments(db, min(wm for _, _, wm in terms), settled_id)
+
+    # Step 2: Count the new comments per term and upsert the deltas
+    _add_counts(db, method, terms, settled_id, TermPopAgg.__table__, workers, chunk_size, verbose)
+    term_ids = [term_id for term_id, _, _ in terms]
+    _refresh_rollups(db, term_ids)
+
+    (
+        db.query(TermPopTerm)
+        .filter(TermPopTerm.id.in_(term_ids))
+        .update({TermPopTerm.last_comment_id: settled_id}, synchronize_session=False)
+    )
+    bump_data_version(db, 'termpop')
+
+    # Step 3: Counts, rollups and watermarks become visible together
+    db.commit()
+    return comments
+
+
+def rebuild_termpop_agg(
+        db: Session,
+        method: str = 'sql',
+        workers: int = 1,
+        chunk_size: int = 1000000,
+        verbose: bool = False
+        ):
+    """
+    Recounts every term over all settled comments into a staging table and
+    swaps it in for dwh.termpop_agg in one transaction.
+
+    Readers keep seeing the previous table until the commit, they only wait
+    on the lock for the instant of the swap, never on the recount itself.
+    Arguments and return value are the same as for populate_termpop_agg.
+    """
+    if method not in TERMPOP_METHODS:
+        raise ValueError(f'Unknown termpop method {method!r}, available: {TERMPOP_METHODS}')
+    settled_id = get_settled_comment_id(db)
+    terms = [(term_id, term, 0) for term_id, term in db.query(TermPopTerm.id, TermPopTerm.term).filter(COUNTED_TERM).all()]
+    comments = _count_comments(db, 0, settled_id) if terms else 0
+
+    # Step 1: Count everything into a fresh staging table, invisible to others until the commit
+    db.execute(text('DROP TABLE IF EXISTS dwh.termpop_agg_staging'))
+    db.execute(text('CREATE TABLE dwh.termpop_agg_staging (LIKE dwh.termpop_agg INCLUDING ALL)'))
+    if terms:
+        _add_counts(db, method, terms, settled_id, STAGING_TABLE, workers, chunk_size, verbose)
+    # validated here, while the old table still serves reads
+    db.execute(text("""
+    ALTER TABLE dwh.termpop_agg_staging
+    ADD CONSTRAINT termpop_agg_term_id_fkey FOREIGN KEY (term_id) REFERENCES dwh.termpop_terms (id)
+    """))
+
+    # Step 2: Swap the tables, the constraint names stay those of the model
+    db.execute(text('LOCK TABLE dwh.termpop_agg IN ACCESS EXCLUSIVE MODE'))
+    db.execute(text('DROP TABLE dwh.termpop_agg'))
+    db.execute(text('ALTER TABLE dwh.termpop_agg_staging RENAME TO termpop_agg'))
+    db.execute(text('ALTER INDEX dwh.termpop_agg_staging_pkey RENAME TO termpop_agg_pkey'))
+    _refresh_rollups(db, [term_id for term_id, _, _ in terms])
+    db.query(TermPopTerm).update({TermPopTerm.last_comment_id: settled_id}, synchronize_session=False)
+    bump_data_version(db, 'termpop')
+
+    # Step 3: Counts, rollups and watermarks become visible together
+    db.commit()
+    return comments
+
+
+def _register_topics(db: Session, names):
+    # the model's topics are created on first use, the IDs are looked up by name
+    db.execute(insert(TopicPopTopic).values([{'topic': name} for name in names]).on_conflict_do_nothing())
+    ids = dict(db.query(TopicPopTopic.topic, TopicPopTopic.id).filter(TopicPopTopic.topic.in_(names)).all())
+    return np.array([ids[name] for name in names], dtype=np.int64)
+
+
+def _comment_batches(db: Session, after_id: int, until_id: int, batch_size: int):
+    # keyset pages, so every batch can commit without holding a cursor open
+    while after_id < until_id:
+        rows = db.execute(
+            select(Comment.id, Comment.text)
+            .where(Comment.id > after_id, Comment.id <= until_id)
+            .order_by(Comment.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def _write_topics(db: Session, assignments: pd.DataFrame):
+    # assignments and the weekly rollup of exactly the newly inserted ones commit together
+    db.execute(text('CREATE TEMPORARY TABLE topicpop_delta (LIKE dwh.topicpop) ON COMMIT DROP'))
+    write_frame(assignments, 'topicpop_delta', db.connection(), schema=None)
+    delta = table('topicpop_delta', column('comment_id'), column('topic_id'))
+    new = (
+        insert(TopicPop)
+        .from_select(['comment_id', 'topic_id'], select(delta.c.comment_id, delta.c.topic_id))
+        .on_conflict_do_nothing()
+        .returning(TopicPop.comment_id, TopicPop.topic_id)
+        .cte('new')
+    )
+    week = buckets.week_of(Comment.time)
+    weekly = (
+        select(new.c.topic_id, week, func.count('*'))
+        .join(Comment, Comment.id == new.c.comment_id)
+        .where(Comment.time.is_not(None))
+        .group_by(new.c.topic_id, week)
+    )
+    stmt = insert(TopicPopByWeek).from_select(['topic_id', 'week', 'occurrence_count'], weekly)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['topic_id', 'week'],
+        set_={'occurrence_count': TopicPopByWeek.occurrence_count + stmt.excluded.occurrence_count}
+    )
+    db.execute(stmt)
+    if not assignments.empty:
+        bump_data_version(db, 'topicpop')
+    db.commit()
+
+
+def populate_topicpop(
+        db: Session,
+        model: KeywordModel = None,
+        batch_size: int = 10000,
+        workers: int = 1,
+        verbose: bool = False
+        ):
+    """
+    Assigns topics to the comments not yet in dwh.topicpop and adds them to
+    the weekly counts in dwh.topicpop_by_week.
+
+    Comments are read in ID order in batches up to the settled comment ID,
+    every batch commits on its own, so an interrupted run resumes after the
+    last comment it stored. Comments matching no topic are not stored, the
+    few of them past the last stored one are classified again next time.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        model (KeywordModel): Topic model, defaults to KeywordModel().
+        batch_size (int): Comments per batch.
+        workers (int): Processes classifying batches, 1 classifies in this process.
+        verbose (bool): Report progress per batch.
+
+    Returns:
+        int: Number of comments classified.
+    """
+    model = model or KeywordModel()
+    settled_id = get_settled_comment_id(db)
+    topic_ids = _register_topics(db, model.topics)
+    last_id = db.query(func.coalesce(func.max(TopicPop.comment_id), 0)).scalar()
+    db.commit()
 
-    # Step 4: Bulk insert the aggregated data into TermPopAgg
-    db.bulk_save_objects(term_pop_agg_entries)
-    db.commit()  # Commit the insertions to the database
\ No newline at end of file
+    comments = 0
+    batches = _comment_batches(db, last_id, settled_id, batch_size)
+    for batch, topics in classify_batches(model, batches, workers):
+        comments += len(batch)
+        assigned = topics >= 0
+        comment_ids = np.fromiter((id for id, _ in batch), dtype=np.int64, count=len(batch))
+        _write_topics(db, pd.DataFrame({
+            'comment_id': comment_ids[assigned],
+            'topic_id': topic_ids[topics[assigned]],
+        }))
+        if verbose:
+            print(f'Classified comments up to {comment_ids[-1]}, {assigned.sum()} of {len(batch)} got a topic')
+    return comments
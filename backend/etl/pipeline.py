@@ -0,0 +1,137 @@
+import json
+import threading
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from time import perf_counter
+from backend.api.models.models import EtlMetric
+
+
+class Stage:
+    """
+    One step of an ETL run.
+
+    Args:
+        name (str): Stage name, as recorded in the metrics.
+        run (Callable[[Session], int]): Does the work in the given session and returns the number of rows processed.
+        depends (Iterable[str]): Stages that have to finish first when they are part of the same run.
+    """
+    def __init__(self, name: str, run, depends=()):
+        self.name = name
+        self.run = run
+        self.depends = tuple(depends)
+
+
+class Pipeline:
+    """
+    Runs stages in dependency order. Stages whose dependencies are done run
+    concurrently in threads, each in its own session, a failed stage skips
+    the stages depending on it while independent ones carry on.
+
+    Wall time, rows and rows/sec of every stage are stored in dwh.etl_metrics
+    and, if metrics_log is set, appended to that file as JSON lines.
+    """
+    def __init__(
+            self,
+            stages,
+            session_factory,
+            concurrency: int = 2,
+            metrics_log: str = None,
+            verbose: bool = False
+            ):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            unknown = set(stage.depends) - set(self.stages)
+            if unknown:
+                raise ValueError(f'Stage {stage.name!r} depends on unknown stages {sorted(unknown)}')
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.metrics_log = metrics_log
+        self.verbose = verbose
+        self._lock = threading.Lock()
+
+    def _store(self, metric: dict):
+        with self.session_factory() as db:
+            db.add(EtlMetric(**metric))
+            db.commit()
+        if self.metrics_log:
+            with self._lock, open(self.metrics_log, 'a') as f:
+                f.write(json.dumps(metric, default=str) + '\n')
+        if self.verbose:
+            rate = f', {metric["rows_per_sec"]:,.0f} rows/sec' if metric['rows_per_sec'] is not None else ''
+            print(f'Stage {metric["stage"]} {metric["status"]} after {metric["seconds"]:.1f}s{rate}')
+
+    def _metric(self, run_id: str, name: str, status: str, started_at: datetime, seconds: float, rows=None, error=None):
+        return {
+            'run_id': run_id,
+            'stage': name,
+            'status': status,
+            'started_at': started_at,
+            'seconds': seconds,
+            'rows': rows,
+            'rows_per_sec': rows / seconds if rows is not None and seconds > 0 else None,
+            'error': error,
+        }
+
+    def _run_stage(self, run_id: str, stage: Stage):
+        if self.verbose:
+            print(f'Stage {stage.name} started')
+        started_at = datetime.now()
+        start = perf_counter()
+        try:
+            with self.session_factory() as db:
+                rows = stage.run(db)
+            metric = self._metric(run_id, stage.name, 'ok', started_at, perf_counter() - start, rows)
+        except Exception:
+            metric = self._metric(run_id, stage.name, 'failed', started_at, perf_counter() - start, error=traceback.format_exc())
+        self._store(metric)
+        return metric
+
+    def run(self, names=None):
+        """
+        Runs the named stages, all of them by default.
+
+        Dependencies outside the selection are not run, they are assumed to be
+        done already.
+
+        Returns:
+            list[dict]: One metrics record per stage, in completion order.
+        """
+        run_id = uuid.uuid4().hex
+        selected = [self.stages[name] for name in names] if names is not None else list(self.stages.values())
+        selected_names = {stage.name for stage in selected}
+        pending = {stage.name: stage for stage in selected}
+        done, failed = set(), set()
+        metrics = []
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            running = {}
+            while pending or running:
+                changed = True
+                while changed:
+                    changed = False
+                    for name, stage in list(pending.items()):
+                        depends = [depend for depend in stage.depends if depend in selected_names]
+                        if any(depend in failed for depend in depends):
+                            del pending[name]
+                            failed.add(name)
+                            metric = self._metric(run_id, name, 'skipped', datetime.now(), 0.0)
+                            self._store(metric)
+                            metrics.append(metric)
+                            changed = True
+                        elif all(depend in done for depend in depends) and len(running) < self.concurrency:
+                            del pending[name]
+                            running[executor.submit(self._run_stage, run_id, stage)] = name
+                if not running:
+                    if pending:
+                        raise ValueError(f'Stages {sorted(pending)} depend on each other in a cycle')
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    metric = future.result()
+                    metrics.append(metric)
+                    (done if metric['status'] == 'ok' else failed).add(name)
+        return metrics
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# fields stored as nullable int64 columns, everything else is kept in object columns
+INT_FIELDS = {'id', 'item', 'descendants', 'score', 'parent', 'poll', 'time'}
+
+
+class RecordBuffer:
+    """
+    Growable columnar store for the rows of one raw table.
+
+    Every field gets a preallocated NumPy array (int64 plus null mask for
+    integer fields, object otherwise) that is filled in place, so appending a
+    record allocates no per-field Python containers. `to_frame` wraps the
+    filled part of the arrays without copying them.
+    """
+    __slots__ = ('fields', 'size', 'capacity', '_columns', '_masks')
+
+    def __init__(self, fields, capacity: int = 1024):
+        self.fields = tuple(fields)
+        self.size = 0
+        self.capacity = capacity
+        self._columns = [self._new_column(field, capacity) for field in self.fields]
+        self._masks = [np.ones(capacity, dtype=bool) if field in INT_FIELDS else None for field in self.fields]
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def _new_column(field, capacity):
+        return np.zeros(capacity, dtype=np.int64) if field in INT_FIELDS else np.empty(capacity, dtype=object)
+
+    def _grow(self):
+        # arrays are replaced instead of resized in place, frames handed out
+        # earlier keep referencing the old ones
+        capacity = self.capacity * 2
+        for i, field in enumerate(self.fields):
+            column = self._new_column(field, capacity)
+            column[:self.size] = self._columns[i][:self.size]
+            self._columns[i] = column
+            if self._masks[i] is not None:
+                mask = np.ones(capacity, dtype=bool)
+                mask[:self.size] = self._masks[i][:self.size]
+                self._masks[i] = mask
+        self.capacity = capacity
+
+    def _set(self, i, row, value):
+        mask = self._masks[i]
+        if mask is None:
+            self._columns[i][row] = value
+        elif value is None:
+            mask[row] = True
+        else:
+            self._columns[i][row] = value
+            mask[row] = False
+
+    def append(self, record: dict):
+        """Appends the buffer's fields from a decoded item, missing keys become NULL."""
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        for i, field in enumerate(self.fields):
+            self._set(i, row, record.get(field))
+        self.size += 1
+
+    def append_values(self, *values):
+        """Appends one row given positionally in field order."""
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        for i, value in enumerate(values):
+            self._set(i, row, value)
+        self.size += 1
+
+    def clear(self):
+        self.size = 0
+
+    def to_frame(self):
+        """Returns the buffered rows as a DataFrame backed by views of the buffer arrays."""
+        n = self.size
+        data = {}
+        for field, column, mask in zip(self.fields, self._columns, self._masks):
+            if mask is None:
+                data[field] = column[:n]
+            else:
+                data[field] = pd.arrays.IntegerArray(column[:n], mask[:n])
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,207 @@
+from sqlalchemy import text
+
+# scrapes an id may fail before it is given up like a permanent 4xx
+MAX_ATTEMPTS = 3
+
+
+def is_permanent(status: int):
+    """Whether a failed fetch is not worth retrying, a 4xx other than 429 means the id is gone for good."""
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+def to_runs(ids, missing=()):
+    """
+    Groups ids into (start, end) runs of consecutive ids, leaving out the
+    missing ones. A range is split at the missing ids without iterating it.
+    """
+    missing = set(missing)
+    runs = []
+    if isinstance(ids, range) and ids.step == 1:
+        start_id, end_id = ids.start, ids.stop - 1
+        for id in sorted(missing):
+            if start_id <= id <= end_id:
+                if id > start_id:
+                    runs.append((start_id, id - 1))
+                start_id = id + 1
+        if start_id <= end_id:
+            runs.append((start_id, end_id))
+        return runs
+    for id in sorted(set(ids) - missing):
+        if runs and runs[-1][1] == id - 1:
+            runs[-1] = (runs[-1][0], id)
+        else:
+            runs.append((id, id))
+    return runs
+
+
+def _cut(runs, ranges):
+    """Cuts the (start, end) ranges out of the (start, end) runs."""
+    for start_id, end_id in ranges:
+        runs = [
+            part
+            for run_start, run_end in runs
+            for part in ((run_start, min(run_end, start_id - 1)), (max(run_start, end_id + 1), run_end))
+            if part[0] <= part[1]
+        ]
+    return runs
+
+
+class Checkpoint:
+    """
+    Tracks which item ids have been scraped as merged [start_id, end_id]
+    intervals in raw.scrape_ranges.
+
+    The table holds one row per contiguous run, so it stays as small as the
+    number of gaps: the resume point is a single index lookup and the ids that
+    never arrived can be listed for a backfill.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+
+    def frontier(self):
+        """Returns the highest id covered by any completed range, 0 if nothing was scraped yet."""
+        frontier_query = text("""
+        SELECT COALESCE(MAX(end_id), 0)
+        FROM raw.scrape_ranges
+        """)
+
+        with self.engine.begin() as con:
+            return con.execute(frontier_query).scalar()
+
+    def covered(self):
+        """Returns the number of ids covered by completed ranges."""
+        covered_query = text("""
+        SELECT COALESCE(SUM(end_id - start_id + 1), 0)
+        FROM raw.scrape_ranges
+        """)
+
+        with self.engine.begin() as con:
+            return con.execute(covered_query).scalar()
+
+    def missing(self, start_id: int, end_id: int):
+        """Returns the (start_id, end_id) runs of the id range [start_id, end_id] that no completed range covers."""
+        overlap_query = text("""
+        SELECT start_id, end_id
+        FROM raw.scrape_ranges
+        WHERE end_id >= :start_id AND start_id <= :end_id
+        ORDER BY start_id
+        """)
+
+        runs = []
+        with self.engine.begin() as con:
+            for covered_start, covered_end in con.execute(overlap_query, {'start_id': start_id, 'end_id': end_id}):
+                if covered_start > start_id:
+                    runs.append((start_id, covered_start - 1))
+                start_id = max(start_id, covered_end + 1)
+        if start_id <= end_id:
+            runs.append((start_id, end_id))
+        return runs
+
+    def gaps(self, limit: int = None):
+        """
+        Returns the (start_id, end_id) runs below the frontier that are missing
+        and still worth fetching, oldest first. Ids that failed for good in
+        raw.failed split the gaps and are left out, so are the ids an
+        unfinished shard in raw.scrape_shards still has to scrape itself.
+        """
+        gaps_query = text("""
+        SELECT
+            start_id,
+            end_id,
+            ARRAY(
+                SELECT item
+                FROM raw.failed
+                WHERE permanent AND item BETWEEN gaps.start_id AND gaps.end_id
+            ) AS permanent
+        FROM (
+            SELECT
+                COALESCE(prev_end, 0) + 1 AS start_id,
+                start_id - 1 AS end_id
+            FROM (
+                SELECT
+                    start_id,
+                    LAG(end_id) OVER (ORDER BY start_id) AS prev_end
+                FROM raw.scrape_ranges
+            ) ranges
+            WHERE start_id > COALESCE(prev_end, 0) + 1
+        ) gaps
+        ORDER BY start_id
+        """)
+
+        owned_query = text("""
+        SELECT last_id + 1, end_id
+        FROM raw.scrape_shards
+        WHERE last_id < end_id
+        """)
+
+        runs = []
+        with self.engine.begin() as con:
+            owned = [tuple(row) for row in con.execute(owned_query)]
+            for start_id, end_id, permanent in con.execute(gaps_query):
+                runs.extend(_cut(to_runs(range(start_id, end_id + 1), permanent), owned))
+                if limit is not None and len(runs) >= limit:
+                    return runs[:limit]
+        return runs
+
+    @staticmethod
+    def record(con, runs):
+        """
+        Marks id runs as completed inside the caller's transaction, merging them
+        with every range they overlap or touch.
+
+        Args:
+            con (Connection): SQLAlchemy connection of the transaction writing the rows.
+            runs (List[Tuple[int, int]]): Completed (start_id, end_id) runs, e.g. from to_runs.
+        """
+        merge_query = text("""
+        WITH touching AS (
+            DELETE FROM raw.scrape_ranges
+            WHERE end_id >= :start_id - 1 AND start_id <= :end_id + 1
+            RETURNING start_id, end_id
+        )
+        INSERT INTO raw.scrape_ranges (start_id, end_id)
+        SELECT LEAST(:start_id, MIN(start_id)), GREATEST(:end_id, MAX(end_id))
+        FROM touching
+        """)
+
+        if not runs:
+            return
+        # writers merging neighbouring runs concurrently would leave them unmerged
+        con.execute(text("SELECT pg_advisory_xact_lock(hashtext('raw.scrape_ranges'))"))
+        for start_id, end_id in runs:
+            con.execute(merge_query, {'start_id': start_id, 'end_id': end_id})
+
+    @staticmethod
+    def record_failures(con, runs, failures):
+        """
+        Updates raw.failed for a written batch inside the caller's transaction.
+        Ids of the batch that arrived are cleared, failed ones are added or get
+        their attempts counted up.
+
+        Args:
+            con (Connection): SQLAlchemy connection of the transaction writing the rows.
+            runs (List[Tuple[int, int]]): (start_id, end_id) runs of the ids that arrived, as passed to record.
+            failures (List[Tuple[int, int]]): (id, HTTP status or None) of the ids that failed.
+        """
+        clear_query = text("""
+        DELETE FROM raw.failed
+        WHERE item BETWEEN :start_id AND :end_id
+        """)
+
+        failure_query = text("""
+        INSERT INTO raw.failed (item, status, attempts, permanent, failed_at)
+        VALUES (:item, :status, 1, :permanent, LOCALTIMESTAMP)
+        ON CONFLICT (item) DO UPDATE SET
+            status = EXCLUDED.status,
+            attempts = raw.failed.attempts + 1,
+            permanent = EXCLUDED.permanent OR raw.failed.attempts + 1 >= :max_attempts,
+            failed_at = EXCLUDED.failed_at
+        """)
+
+        if runs:
+            con.execute(clear_query, [{'start_id': start_id, 'end_id': end_id} for start_id, end_id in runs])
+        if failures:
+            con.execute(failure_query, [
+                {'item': id, 'status': status, 'permanent': is_permanent(status), 'max_attempts': MAX_ATTEMPTS}
+                for id, status in failures
+            ])
@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import aiohttp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import text
+from backend.api.database import make_etl_engine
+from backend.etl.scraper.scraper import API_URL, Scraper
+
+
+def run_shard(shard_id: int, scraper_kwargs: dict):
+    """
+    Worker process entry point, scrapes one shard with its own event loop and engine.
+
+    The shard is claimed with a session-level advisory lock held until it is
+    done. A shard another coordinator's worker is scraping is left alone, and
+    the server releases the lock if a worker dies, so the next run can take
+    the shard over.
+
+    Returns:
+        bool: Whether the shard was claimed and scraped.
+    """
+    claim_query = text("SELECT pg_try_advisory_lock(hashtext('raw.scrape_shards'), :shard_id)")
+    engine = make_etl_engine()
+
+    async def scrape():
+        async with Scraper(shard_id=shard_id, engine=engine, **scraper_kwargs) as scraper:
+            await scraper.begin_scraping()
+
+    try:
+        # autocommit, the claim must not keep a transaction open while the shard runs
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as claim:
+            if not claim.execute(claim_query, {'shard_id': shard_id}).scalar():
+                return False
+            try:
+                asyncio.run(scrape())
+            finally:
+                claim.execute(text("SELECT pg_advisory_unlock(hashtext('raw.scrape_shards'), :shard_id)"), {'shard_id': shard_id})
+        return True
+    finally:
+        engine.dispose()
+
+
+class Coordinator:
+    """
+    Splits the outstanding id range into shards recorded in raw.scrape_shards
+    and scrapes them in parallel worker processes.
+
+    Shards that did not finish in an earlier run keep their range and are picked
+    up again from their own last_id, new shards start after the highest id any
+    shard or completed range has covered, so ranges never overlap or leave gaps.
+    Planning is serialized on the shard table and every worker claims its shard
+    with an advisory lock, so concurrent coordinators never scrape the same
+    shard at once.
+    """
+    def __init__(
+            self,
+            workers: int = 4,
+            shard_size: int = 1000000,
+            scraper_kwargs: dict = None,
+            verbose: bool = False
+            ):
+        self.workers = workers
+        self.shard_size = shard_size
+        self.scraper_kwargs = scraper_kwargs or {}
+        self.verbose = verbose
+        self.engine = make_etl_engine(pool_size=1)
+
+    async def _get_max(self):
+        async with aiohttp.ClientSession() as session:
+            api_url = self.scraper_kwargs.get('api_url', API_URL)
+            async with session.get(f'{api_url}/maxitem.json') as r:
+                r.raise_for_status()
+                return int(await r.text())
+
+    def plan(self, max_id: int = None):
+        """
+        Creates shards for every id up to max_id not covered yet and returns the
+        ids of all unfinished shards.
+        """
+        if max_id is None:
+            max_id = asyncio.run(self._get_max())
+        frontier_query = text("""
+        SELECT GREATEST(
+            (SELECT MAX(end_id) FROM raw.scrape_shards),
+            (SELECT MAX(end_id) FROM raw.scrape_ranges)
+        )
+        """)
+        insert_query = text("""
+        INSERT INTO raw.scrape_shards (start_id, end_id, last_id)
+        VALUES (:start_id, :end_id, :start_id - 1)
+        """)
+        unfinished_query = text("""
+        SELECT id
+        FROM raw.scrape_shards
+        WHERE last_id < end_id
+        ORDER BY id
+        """)
+
+        with self.engine.begin() as con:
+            # serialize concurrent coordinators on the shard table
+            con.execute(text('LOCK TABLE raw.scrape_shards IN EXCLUSIVE MODE'))
+            frontier = con.execute(frontier_query).scalar() or 0
+            new_shards = [
+                {'start_id': start_id, 'end_id': min(start_id + self.shard_size - 1, max_id)}
+                for start_id in range(frontier + 1, max_id + 1, self.shard_size)
+            ]
+            if new_shards:
+                con.execute(insert_query, new_shards)
+            return list(con.execute(unfinished_query).scalars())
+
+    def run(self, max_id: int = None):
+        shard_ids = self.plan(max_id)
+        if self.verbose:
+            print(f'Scraping {len(shard_ids)} shards with {self.workers} workers')
+        failed = []
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(run_shard, shard_id, self.scraper_kwargs): shard_id for shard_id in shard_ids}
+            for future in as_completed(futures):
+                shard_id = futures[future]
+                try:
+                    claimed = future.result()
+                except Exception as e:
+                    # progress is persisted per batch, the next run resumes this shard
+                    failed.append(shard_id)
+                    if self.verbose:
+                        print(f'Shard {shard_id} failed: {e!r}')
+                    continue
+                done += 1
+                if self.verbose:
+                    if claimed:
+                        print(f'Shard {shard_id} finished, {done} of {len(futures)} shards done')
+                    else:
+                        print(f'Shard {shard_id} is being scraped by another coordinator, {done} of {len(futures)} shards done')
+        return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape the outstanding Hacker News id range in parallel shards.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    args = parser.parse_args()
+
+    coordinator = Coordinator(
+        workers=args.workers,
+        shard_size=args.shard_size,
+        scraper_kwargs={'batch_size': args.batch_size, 'concurrency': args.concurrency, 'connection_limit': args.concurrency},
+        verbose=True,
+    )
+    failed = coordinator.run()
+    if failed:
+        raise SystemExit(f'{len(failed)} shards failed and will resume on the next run: {failed}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import json
+
+# optional faster parsers, the first one installed becomes the default
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+DECODERS = {
+    name: loads
+    for name, loads in (
+        ('orjson', orjson and orjson.loads),
+        ('simdjson', simdjson and simdjson.loads),
+        ('ujson', ujson and ujson.loads),
+        ('json', json.loads),
+    )
+    if loads is not None
+}
+
+
+def available_decoders():
+    return list(DECODERS)
+
+
+def make_decoder(name: str = None):
+    """
+    Returns a function decoding a raw item payload (bytes) to a dict.
+
+    Args:
+        name (str): Backend name out of available_decoders(), defaults to the fastest installed one.
+
+    Returns:
+        tuple: (backend name, decode function)
+    """
+    if name is None:
+        name = next(iter(DECODERS))
+    if name not in DECODERS:
+        raise ValueError(f'JSON decoder {name!r} is not installed, available: {available_decoders()}')
+    return name, DECODERS[name]
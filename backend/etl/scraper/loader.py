@@ -0,0 +1,64 @@
+from io import StringIO
+
+# rows handed to executemany per round trip on backends without COPY
+EXECUTEMANY_CHUNKSIZE = 10000
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        # pandas stores nullable integer columns as floats, COPY does not cast 3.0 to INTEGER
+        return str(int(value)) if value.is_integer() else str(value)
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def copy_insert(table, conn, keys, data_iter):
+    """
+    pandas.DataFrame.to_sql insertion method that streams all rows through
+    PostgreSQL COPY FROM STDIN using an in-memory text-format buffer.
+    """
+    buffer = StringIO()
+    for row in data_iter:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    columns = ', '.join(f'"{key}"' for key in keys)
+    name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+    sql = f'COPY {name} ({columns}) FROM STDIN'
+    with conn.connection.cursor() as cur:
+        if conn.dialect.driver == 'psycopg2':
+            cur.copy_expert(sql, buffer)
+        else:
+            with cur.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def supports_copy(con):
+    return con.dialect.name == 'postgresql' and con.dialect.driver in ('psycopg2', 'psycopg')
+
+
+def write_frame(df, name, con, schema='raw'):
+    """
+    Appends a DataFrame to an existing table, using COPY on PostgreSQL and
+    batched executemany INSERTs on every other backend.
+
+    Args:
+        df (pd.DataFrame): Rows to insert, columns named after the table columns.
+        name (str): Target table name.
+        con (Connection): SQLAlchemy connection, the caller owns the transaction.
+        schema (str): Target schema.
+    """
+    if supports_copy(con):
+        df.to_sql(name=name, schema=schema, con=con, if_exists='append', index=False, method=copy_insert)
+    else:
+        df.to_sql(name=name, schema=schema, con=con, if_exists='append', index=False, chunksize=EXECUTEMANY_CHUNKSIZE)
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import aiohttp
+import gzip
+import json
+import random
+from aiohttp import web
+from backend.etl.scraper.scraper import API_URL
+
+# corpus files are gzipped text, one "<id>\t<raw item payload>" line per item
+
+
+def load_corpus(path: str):
+    """Reads a recorded corpus into a dict mapping item id to the raw payload bytes."""
+    corpus = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            id, payload = line.rstrip('\n').split('\t', 1)
+            corpus[int(id)] = payload.encode()
+    return corpus
+
+
+def write_corpus(path: str, items):
+    """Writes (id, payload) pairs, payloads as bytes or str, to a corpus file."""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for id, payload in items:
+            if isinstance(payload, bytes):
+                payload = payload.decode()
+            f.write(f'{id}\t{payload}\n')
+
+
+async def record_corpus(path: str, start_id: int, end_id: int, api_url: str = API_URL, concurrency: int = 50):
+    """Downloads the items start_id..end_id from the API and stores their raw payloads."""
+    ids = iter(range(start_id, end_id + 1))
+    items = []
+
+    async def worker(session):
+        for id in ids:
+            async with session.get(f'{api_url}/item/{id}.json') as r:
+                r.raise_for_status()
+                items.append((id, await r.read()))
+
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    write_corpus(path, sorted(items))
+
+
+def synthetic_corpus(path: str, n: int, seed: int = 0):
+    """Writes n items shaped like real API payloads, for when no recording is at hand."""
+    rng = random.Random(seed)
+    items = []
+    for id in range(1, n + 1):
+        roll = rng.random()
+        time = 1700000000 + id * 2
+        if roll < 0.01:
+            item = None
+        elif roll < 0.03:
+            item = {'id': id, 'deleted': True, 'type': 'comment', 'time': time}
+        elif roll < 0.15:
+            item = {'by': 'pg', 'descendants': rng.randint(0, 500), 'id': id, 'kids': [id + k for k in range(1, 6)],
+                    'score': rng.randint(1, 1000), 'time': time, 'title': f'Show HN: Project {id}',
+                    'type': 'story', 'url': f'https://example.com/{id}'}
+        else:
+            item = {'by': 'dang', 'id': id, 'kids': [id + 1], 'parent': max(1, id - rng.randint(1, 50)), 'time': time,
+                    'type': 'comment', 'text': 'I&#x27;d say &quot;it depends&quot;.<p>' * rng.randint(1, 20)}
+        items.append((id, json.dumps(item, separators=(',', ':'))))
+    write_corpus(path, items)
+
+
+class ReplayServer:
+    """
+    Local stand-in for the Hacker News API serving item/{id}.json and
+    maxitem.json from a corpus, with optional injected latency and errors.
+
+    Ids missing from the corpus answer `null` like the real API does.
+    """
+    def __init__(
+            self,
+            corpus: dict,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            seed: int = None
+            ):
+        self.corpus = corpus
+        self.max_id = max(corpus, default=0)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+        self.runner = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/v0'
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/v0/item/{id}.json', self._item)
+        app.router.add_get('/v0/maxitem.json', self._maxitem)
+        return app
+
+    async def _item(self, request):
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.random.random() < self.error_rate:
+            raise web.HTTPServiceUnavailable()
+        payload = self.corpus.get(int(request.match_info['id']), b'null')
+        return web.Response(body=payload, content_type='application/json')
+
+    async def _maxitem(self, request):
+        return web.Response(text=str(self.max_id), content_type='application/json')
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        # resolve the actual port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record a corpus of Hacker News items or serve one locally.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record = subparsers.add_parser('record')
+    record.add_argument('path')
+    record.add_argument('start_id', type=int)
+    record.add_argument('end_id', type=int)
+    synthetic = subparsers.add_parser('synthetic')
+    synthetic.add_argument('path')
+    synthetic.add_argument('items', type=int)
+    serve = subparsers.add_parser('serve')
+    serve.add_argument('path')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--latency', type=float, default=0.0)
+    serve.add_argument('--jitter', type=float, default=0.0)
+    serve.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        asyncio.run(record_corpus(args.path, args.start_id, args.end_id))
+    elif args.command == 'synthetic':
+        synthetic_corpus(args.path, args.items)
+    else:
+        server = ReplayServer(load_corpus(args.path), latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, port=args.port)
+        print(f'Serving {len(server.corpus)} items on port {args.port}, use api_url=http://127.0.0.1:{args.port}/v0')
+        web.run_app(server.app(), host='127.0.0.1', port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import html
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+TEXT_FIELDS = ('title', 'text')
+EPOCH_FIELDS = ('time',)
+
+# entities the HN API emits in nearly every text, '&amp;' has to be replaced last
+COMMON_ENTITIES = (
+    ('&#x27;', "'"),
+    ('&quot;', '"'),
+    ('&#x2F;', '/'),
+    ('&gt;', '>'),
+    ('&lt;', '<'),
+)
+
+# utc offsets only change on quarter hours, so one lookup per 15 minute slot is exact
+OFFSET_SLOT = 900
+
+
+def _unescape(text):
+    if text is None or text != text:
+        return None
+    if '&' in text:
+        fast = text
+        for entity, char in COMMON_ENTITIES:
+            fast = fast.replace(entity, char)
+        # anything but '&amp;' left over needs the full HTML5 entity table
+        if '&' in fast.replace('&amp;', ''):
+            text = html.unescape(text)
+        else:
+            text = fast.replace('&amp;', '&')
+    if '\x00' in text or '\\x00' in text:
+        text = text.replace('\\x00', '').replace('\x00', '')
+    return text
+
+
+def sanitize_text(column: pd.Series):
+    """
+    Unescapes HTML entities and strips NUL characters for a whole text column.
+
+    The entities the API actually uses are replaced with plain str.replace,
+    html.unescape only runs on the rare values with anything else in them.
+    """
+    values = column.to_numpy(dtype=object)
+    return pd.Series([_unescape(value) for value in values], index=column.index, dtype=object)
+
+
+def _local_offsets(epochs: np.ndarray):
+    slots, inverse = np.unique(epochs // OFFSET_SLOT, return_inverse=True)
+    offsets = np.array([
+        (datetime.fromtimestamp(slot * OFFSET_SLOT) - datetime(1970, 1, 1)).total_seconds() - slot * OFFSET_SLOT
+        for slot in slots.tolist()
+    ], dtype=np.int64)
+    return offsets[inverse]
+
+
+def epoch_to_datetime(column: pd.Series):
+    """
+    Converts a column of unix epoch seconds to naive local timestamps, the same
+    values datetime.fromtimestamp returns. NULLs become NaT.
+    """
+    epochs = pd.array(column, dtype='Int64')
+    mask = epochs.isna()
+    values = epochs.to_numpy(dtype=np.int64, na_value=0)
+    if len(values):
+        values = values + _local_offsets(values)
+    result = pd.Series(pd.to_datetime(values, unit='s'), index=column.index)
+    result[mask] = pd.NaT
+    return result
+
+
+def transform_batch(batch: dict, scrape_time):
+    """
+    Applies the column transforms to every table frame of a scraped batch in place.
+
+    Args:
+        batch (dict): Table name to DataFrame, as returned by Scraper._take_batch.
+        scrape_time (datetime): Timestamp recorded for every item of the batch.
+    """
+    for table, df in batch.items():
+        for field in TEXT_FIELDS:
+            if field in df.columns:
+                df[field] = sanitize_text(df[field])
+        for field in EPOCH_FIELDS:
+            if field in df.columns:
+                df[field] = epoch_to_datetime(df[field])
+    batch['scrape']['scrape_time'] = scrape_time
+    return batch
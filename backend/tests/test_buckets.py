@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from backend.api.models.buckets import bucket_of_days, labels_of_days
+
+# every day the reference is checked on, a few years either side of the data
+DAYS = [date(1999, 1, 1) + timedelta(days=i) for i in range((date(2031, 1, 1) - date(1999, 1, 1)).days)]
+
+
+def _bucket(day: date):
+    # GREATEST(date_trunc('week', day), date_trunc('month', day))
+    return max(day - timedelta(days=day.weekday()), day.replace(day=1))
+
+
+def _days(days):
+    return np.array(days, dtype='datetime64[D]')
+
+
+def test_bucket_of_days_matches_date_trunc():
+    expected = _days([_bucket(day) for day in DAYS])
+    assert np.array_equal(bucket_of_days(_days(DAYS)), expected)
+
+
+def test_buckets_never_span_weeks_or_months():
+    for day in DAYS:
+        bucket = _bucket(day)
+        assert bucket.isocalendar()[:2] == day.isocalendar()[:2]
+        assert (bucket.year, bucket.month) == (day.year, day.month)
+
+
+@pytest.mark.parametrize('grain, reference', [
+    ('week', lambda day: {'year': day.isocalendar()[0], 'week': day.isocalendar()[1]}),
+    ('month', lambda day: {'year': day.year, 'month': day.month}),
+    ('year', lambda day: {'year': day.year}),
+])
+def test_labels_of_days_match_extract(grain, reference):
+    labels = labels_of_days(grain, _days(DAYS))
+    expected = [reference(day) for day in DAYS]
+    assert set(labels) == set(expected[0])
+    for name, values in labels.items():
+        assert values.tolist() == [row[name] for row in expected]
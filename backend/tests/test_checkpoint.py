@@ -0,0 +1,52 @@
+import random
+import pytest
+from backend.etl.scraper.checkpoint import _cut, is_permanent, to_runs
+
+
+def _runs(ids):
+    runs = []
+    for id in sorted(set(ids)):
+        if runs and runs[-1][1] == id - 1:
+            runs[-1][1] = id
+        else:
+            runs.append([id, id])
+    return [tuple(run) for run in runs]
+
+
+def test_to_runs_of_a_range():
+    assert to_runs(range(1, 11)) == [(1, 10)]
+    assert to_runs(range(1, 11), [1, 5, 6, 10, 42]) == [(2, 4), (7, 9)]
+    assert to_runs(range(5, 5)) == []
+    assert to_runs(range(1, 4), [1, 2, 3]) == []
+
+
+def test_to_runs_of_an_id_list():
+    assert to_runs([7, 3, 4, 5, 9, 8, 3]) == [(3, 5), (7, 9)]
+    assert to_runs([1, 2, 3, 4], [2]) == [(1, 1), (3, 4)]
+    assert to_runs([]) == []
+
+
+def test_to_runs_matches_grouping_consecutive_ids():
+    rng = random.Random(0)
+    for _ in range(200):
+        start = rng.randint(1, 50)
+        ids = range(start, start + rng.randint(0, 100))
+        missing = rng.sample(range(1, 200), rng.randint(0, 20))
+        expected = _runs(set(ids) - set(missing))
+        assert to_runs(ids, missing) == expected
+        assert to_runs(list(ids), missing) == expected
+
+
+def test_cut_removes_ranges_from_runs():
+    runs = [(1, 10), (20, 30), (40, 40)]
+    assert _cut(runs, []) == runs
+    assert _cut(runs, [(5, 25)]) == [(1, 4), (26, 30), (40, 40)]
+    assert _cut(runs, [(1, 10), (40, 50)]) == [(20, 30)]
+    assert _cut(runs, [(22, 22), (0, 1)]) == [(2, 10), (20, 21), (23, 30), (40, 40)]
+
+
+@pytest.mark.parametrize('status, permanent', [
+    (None, False), (404, True), (410, True), (400, True), (429, False), (500, False), (503, False),
+])
+def test_is_permanent(status, permanent):
+    assert is_permanent(status) == permanent
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from backend.api.models.models import Comment, Failed, ScrapeRange, ScrapeShard, TermPopTerm
+from backend.benchmarks.scratch import create_scratch_schema, scratch_url
+from backend.etl.dwh.update_dwh import get_settled_comment_id, populate_termpop_agg
+from backend.etl.scraper.checkpoint import Checkpoint
+
+N = 2000
+
+
+@pytest.fixture
+def engine():
+    try:
+        url = scratch_url()
+    except KeyError:
+        pytest.skip('needs BENCH_DB_URL or DBUSER/DBPW for the hndb_bench database')
+    engine = create_engine(url)
+    try:
+        create_scratch_schema(engine, 'termpop')
+    except OperationalError as e:
+        pytest.skip(f'database not available: {e}')
+
+    # every id but 1000 arrived and mentions the term
+    ids = [id for id in range(1, N+1) if id != 1000]
+    with engine.begin() as con:
+        con.execute(Comment.__table__.insert(), [
+            {'id': id, 'text': 'python', 'by': 'pg', 'time': pd.Timestamp('2020-01-01'), 'parent': 1} for id in ids
+        ])
+        con.execute(ScrapeRange.__table__.insert(), [{'start_id': 1, 'end_id': 999}, {'start_id': 1001, 'end_id': N}])
+        con.execute(TermPopTerm.__table__.insert(), {'term': 'python'})
+    yield engine
+    engine.dispose()
+
+
+def _fail(engine, permanent: bool):
+    with engine.begin() as con:
+        con.execute(Failed.__table__.insert(), {
+            'item': 1000, 'status': 404 if permanent else 503, 'attempts': 1,
+            'permanent': permanent, 'failed_at': pd.Timestamp('2020-01-01'),
+        })
+
+
+def _counted(engine):
+    with engine.connect() as con:
+        return con.execute(text('SELECT COALESCE(SUM(occurrence_count), 0) FROM dwh.termpop_agg')).scalar()
+
+
+def test_permanent_failure_does_not_hold_back_later_ids(engine):
+    _fail(engine, permanent=True)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        assert get_settled_comment_id(db) == N
+        populate_termpop_agg(db)
+        assert db.query(TermPopTerm.last_comment_id).scalar() == N
+    assert _counted(engine) == N - 1
+    assert Checkpoint(engine).gaps() == []
+
+
+def test_pending_failure_holds_back_later_ids(engine):
+    _fail(engine, permanent=False)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        assert get_settled_comment_id(db) == 999
+        populate_termpop_agg(db)
+    assert _counted(engine) == 999
+    assert Checkpoint(engine).gaps() == [(1000, 1000)]
+
+
+def test_gaps_leave_unfinished_shards_alone(engine):
+    _fail(engine, permanent=False)
+    with engine.begin() as con:
+        con.execute(ScrapeShard.__table__.insert(), {'start_id': 1, 'end_id': N, 'last_id': 999})
+    assert Checkpoint(engine).gaps() == []
+    with engine.begin() as con:
+        con.execute(text('UPDATE raw.scrape_shards SET last_id = end_id'))
+    assert Checkpoint(engine).gaps() == [(1000, 1000)]
@@ -0,0 +1,37 @@
+import random
+import pytest
+from backend.etl.dwh.term_counter import TermMatcher, ahocorasick
+
+BACKENDS = ['python', pytest.param('pyahocorasick', marks=pytest.mark.skipif(ahocorasick is None, reason='pyahocorasick is not installed'))]
+
+
+def _ilike(terms, text):
+    # text ILIKE '%' || term || '%' for every term, NULL matching nothing
+    return sorted(index for index, term in enumerate(terms) if term is not None and term.lower() in text.lower())
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_matches_like_ilike(backend):
+    terms = ['Python', 'py', 'thon', 'rust', 'RUST', 'c++', '100%', 'a_b', 'ß', 'the', 'he', 'e']
+    matcher = TermMatcher(terms, backend)
+    for text in ['I like python', 'RUSTY PY', '100% c++', 'a_b and axb', 'Straße', 'the end', '']:
+        assert sorted(matcher.match(text)) == _ilike(terms, text)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_matches_random_texts(backend):
+    rng = random.Random(0)
+    alphabet = 'abcAB '
+    terms = list({''.join(rng.choices(alphabet[:-1], k=rng.randint(1, 4))) for _ in range(40)})
+    matcher = TermMatcher(terms, backend)
+    for _ in range(300):
+        text = ''.join(rng.choices(alphabet, k=rng.randint(0, 30)))
+        assert sorted(matcher.match(text)) == _ilike(terms, text)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_null_and_empty_terms(backend):
+    assert sorted(TermMatcher([None, '', 'x', None], backend).match('abc')) == [1]
+    assert TermMatcher([None], backend).match('abc') == []
+    assert TermMatcher(['', ''], backend).match('abc') == [0, 1]
+    assert TermMatcher([], backend).match('abc') == []
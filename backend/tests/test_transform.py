@@ -0,0 +1,35 @@
+import html
+import random
+from backend.etl.scraper.transform import COMMON_ENTITIES, _unescape
+
+TEXTS = [
+    'plain text',
+    'It&#x27;s &quot;quoted&quot; &lt;i&gt;markup&lt;&#x2F;i&gt;',
+    'fish &amp; chips',
+    '&amp;lt; stays an entity once',
+    '&amp;#x27;',
+    'AT&amp;T &copy; &eacute;t&eacute; &nbsp;',
+    '&lt no semicolon &gt',
+    '&#128512; &#x1F600;',
+    '& alone, &; and &unknown;',
+    '',
+]
+
+
+def test_unescape_matches_html_unescape():
+    for text in TEXTS:
+        assert _unescape(text) == html.unescape(text)
+
+
+def test_unescape_matches_html_unescape_on_random_entity_soup():
+    rng = random.Random(0)
+    pieces = [entity for entity, _ in COMMON_ENTITIES] + ['&amp;', '&', ';', 'amp', '#x27', '&eacute;', 'a', ' ']
+    for _ in range(2000):
+        text = ''.join(rng.choices(pieces, k=rng.randint(0, 12)))
+        assert _unescape(text) == html.unescape(text)
+
+
+def test_unescape_strips_nul_and_keeps_null():
+    assert _unescape('a\x00b\\x00c') == 'abc'
+    assert _unescape(None) is None
+    assert _unescape(float('nan')) is None
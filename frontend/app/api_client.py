@@ -0,0 +1,41 @@
+import requests
+import threading
+from collections import OrderedDict
+
+API_URL = 'http://localhost:8000'
+
+# URLs whose last response is kept, the least recently used ones are dropped
+MAX_RESPONSES = 256
+
+# last 200 response and ETag per URL, revalidated on every call so an
+# unchanged series costs a 304 without a body instead of the full JSON
+_responses = OrderedDict()
+# Dash runs callbacks in several threads
+_lock = threading.Lock()
+
+def _cached(url: str):
+    with _lock:
+        cached = _responses.get(url)
+        if cached is not None:
+            _responses.move_to_end(url)
+        return cached
+
+def _store(url: str, etag: str, data):
+    with _lock:
+        _responses[url] = (etag, data)
+        _responses.move_to_end(url)
+        while len(_responses) > MAX_RESPONSES:
+            _responses.popitem(last=False)
+
+def get(path: str):
+    """GETs an API path and returns the status code and the decoded JSON body."""
+    url = API_URL + path
+    cached = _cached(url)
+    headers = {'If-None-Match': cached[0]} if cached else {}
+    response = requests.get(url, headers=headers)
+    if response.status_code == 304 and cached:
+        return 200, cached[1]
+    data = response.json() if response.status_code == 200 else None
+    if response.status_code == 200 and 'ETag' in response.headers:
+        _store(url, response.headers['ETag'], data)
+    return response.status_code, data
@@ -1,4 +1,4 @@
-import requests
+import api_client
 from dash import Dash, register_page, Output, Input, State, html, dcc, callback
 import dash_bootstrap_components as dbc
 import plotly.express as px
@@ -75,9 +75,8 @@ def register_callbacks(app: Dash):
         Input('term_dropdown', 'id')
     )
     def load_terms(_):
-        response = requests.get('http://localhost:8000/termpop/terms')
-        if response.status_code == 200:
-            terms = response.json()
+        status_code, terms = api_client.get('/termpop/terms')
+        if status_code == 200:
             if 'id' in terms[0]:
                 options = [{'label': term['term'].title(), 'value': term['id']} for term in terms]
             else:
@@ -94,9 +93,8 @@ def register_callbacks(app: Dash):
     )
     def update_graph(term_id, agg, terms):
         if term_id is not None and agg is not None:
-            response = requests.get(f'http://localhost:8000/termpop/agg?term_id={term_id}&agg={agg}')
-            if response.status_code == 200:
-                data = response.json()
+            status_code, data = api_client.get(f'/termpop/agg?term_id={term_id}&agg={agg}')
+            if status_code == 200:
                 if data:
                     df = pd.DataFrame(data)
                     if agg == 'year':